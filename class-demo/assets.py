@@ -0,0 +1,151 @@
+import json
+import os
+from collections import OrderedDict
+
+import pygame
+
+FONT_CACHE = ".font_cache.json"
+BUILD_DIR = "build"
+BUILD_INDEX = os.path.join(BUILD_DIR, "sprites.json")     # written by build_assets.py
+
+
+class Assets:
+    """Image cache: one decoded, converted surface per (path, size, alpha).
+
+    Source images are read from disk once and kept for the whole run.  Scaled
+    variants live in a bounded LRU; anything passed to preload() is pinned
+    so gameplay never has to go back to the disk or rescale.  Returned
+    surfaces are shared between sprites, so copy() before modifying one.
+
+    Variants that build_assets.py pre-scaled come straight from its sprite
+    sheet or files instead, unless their source image changed since.
+    """
+    def __init__(self, max_variants=64):
+        self.max_variants = max_variants
+        self.sources  = {}                 # (path, alpha) -> surface
+        self.variants = OrderedDict()      # (path, size, alpha) -> surface
+        self.pinned   = set()
+        self.built    = None               # (path, size, alpha) -> (file, rect or None)
+        self.files    = {}                 # built file -> surface
+        self.index_path = BUILD_INDEX
+        self.hits = self.misses = self.loads = self.evictions = self.prebuilt = 0
+
+    def source(self, path, alpha=True):
+        key = path, alpha
+        surf = self.sources.get(key)
+        if surf is None:
+            surf = converted(pygame.image.load(path), alpha)
+            self.sources[key] = surf
+            self.loads += 1
+        return surf
+
+    def image(self, path, size=None, alpha=True):
+        """Surface for path scaled to size (None keeps the original size)"""
+        key = path, tuple(size) if size else None, alpha
+        surf = self.variants.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.variants.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = self.built_variant(key)
+        if surf is not None:
+            self.prebuilt += 1
+        else:
+            surf = self.source(path, alpha)
+            if size and surf.get_size()!=tuple(size):
+                surf = pygame.transform.scale(surf, size)
+        self.variants[key] = surf
+        self.evict()
+        return surf
+
+    def built_variant(self, key):
+        """The pre-scaled surface for key from the asset build, or None"""
+        if self.built is None: self.built = read_index(self.index_path)
+        entry = self.built.get(key)
+        if entry is None: return None
+        name, rect = entry
+        surf = self.files.get(name)
+        if surf is None:
+            try:
+                surf = converted(pygame.image.load(os.path.join(os.path.dirname(self.index_path), name)),
+                                 key[2])
+            except (pygame.error, FileNotFoundError):
+                del self.built[key]
+                return None
+            self.files[name] = surf
+            self.loads += 1
+        return surf.subsurface(rect) if rect else surf
+
+    def preload(self, specs):
+        """Load and pin (path, size, alpha) variants; missing files are skipped"""
+        for path, size, alpha in specs:
+            try:
+                self.image(path, size, alpha)
+            except (pygame.error, FileNotFoundError):
+                continue
+            self.pinned.add((path, tuple(size) if size else None, alpha))
+
+    def evict(self):
+        while len(self.variants) - len(self.pinned) > self.max_variants:
+            for key in self.variants:
+                if key not in self.pinned:
+                    del self.variants[key]
+                    self.evictions += 1
+                    break
+
+    def stats(self):
+        return {"loads": self.loads, "hits": self.hits, "misses": self.misses, "prebuilt": self.prebuilt,
+                "evictions": self.evictions, "variants": len(self.variants)}
+
+
+def read_index(path):
+    """build_assets.py's index as {(path, size, alpha): (file, rect)}, leaving out
+    variants whose source image has changed since the build"""
+    try:
+        with open(path) as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    fresh = set()
+    for src, (mtime, size) in index["sources"].items():
+        try:
+            st = os.stat(src)
+        except OSError:
+            continue
+        if (st.st_mtime_ns, st.st_size)==(mtime, size): fresh.add(src)
+    return {(src, tuple(size), alpha): (name, rect)
+            for src, size, alpha, name, rect in index["variants"] if src in fresh}
+
+
+def converted(surf, alpha=True):
+    """convert()/convert_alpha() to the display format, if there is a display
+    surface; the texture backend has none and SDL converts on upload instead."""
+    if pygame.display.get_surface() is None: return surf
+    return surf.convert_alpha() if alpha else surf.convert()
+
+
+def system_font(name, size, cache_path=FONT_CACHE):
+    """SysFont without the font scan: the resolved path is cached on disk.
+
+    pygame.font.SysFont/match_font list every installed font, which can take
+    most of a second.  The first run pays for it once and saves the answer
+    (including "not installed") for later runs.
+    """
+    try:
+        with open(cache_path) as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        cache = {}
+    if name not in cache or (cache[name] and not os.path.exists(cache[name])):
+        cache[name] = pygame.font.match_font(name)
+        try:
+            with open(cache_path, "w") as fh:
+                json.dump(cache, fh)
+        except OSError:
+            pass
+    return pygame.font.Font(cache[name], size)      # None = pygame's default font
+
+
+# Shared by every sprite in the process
+assets = Assets()
@@ -0,0 +1,288 @@
+"""Headless frame-time benchmarks for main.py (Space Invaders) and dash.py (runner).
+
+    python bench.py --out results.json
+    python bench.py --out new.json --compare results.json
+    python bench.py --replay game.rpl       # a recorded game instead (see replay.py)
+
+Each scenario plays a game at a fixed 60 FPS timestep with a scripted bot
+and SDL's dummy drivers, timing update / collision / draw for every frame.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import numpy as np
+import pygame
+
+from capture import Capture
+from assets import assets
+import main
+import replay
+
+PHASES = ("update", "collide", "draw")
+DT = 1000//main.FPS
+
+
+class Phases:
+    """Per-frame timings, with methods wrapped so their time is booked to a phase"""
+    def __init__(self):
+        self.frames = {name: [] for name in PHASES + ("frame",)}
+        self.current = dict.fromkeys(PHASES, 0.0)
+
+    def wrap(self, obj, method, phase):
+        original = getattr(obj, method)
+        current = self.current
+        def timed(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                current[phase] += time.perf_counter() - t
+        setattr(obj, method, timed)
+
+    def end_frame(self, total):
+        cur = self.current
+        # collide() runs inside update, so take it back out
+        self.frames["update"].append((cur["update"] - cur["collide"])*1000)
+        self.frames["collide"].append(cur["collide"]*1000)
+        self.frames["draw"].append(cur["draw"]*1000)
+        self.frames["frame"].append(total*1000)
+        for k in cur: cur[k] = 0.0
+
+
+def run_frames(frames, tick, phases, grid=None):
+    """Call tick() frames times, recording frame time and allocation counters.
+
+    grid() returns the game's current SpatialHash; its frame_stats() are
+    averaged per frame into "broad_phase".
+    """
+    gc.collect()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    blocks = sys.getallocatedblocks()
+    broad = Counter()
+    if grid: grid().frame_stats()              # drop whatever setup counted
+    for _ in range(frames):
+        t = time.perf_counter()
+        tick()
+        phases.end_frame(time.perf_counter() - t)
+        if grid: broad.update(grid().frame_stats())
+    extra = {
+        "gc_collections": sum(s["collections"] for s in gc.get_stats()) - collections,
+        "alloc_blocks_per_frame": (sys.getallocatedblocks() - blocks)/frames,
+    }
+    if grid: extra["broad_phase"] = {k: v/frames for k, v in broad.items()}
+    return extra
+
+
+# ───────── Space Invaders ─────────
+def invaders_bot(game, rng):
+    """Chase the nearest invader column and keep firing"""
+    inputs = main.INPUT_FIRE
+    if game.enemies:
+        xs, _ = game.enemies.positions()
+        target = int(xs[rng.randrange(len(xs))]) + game.enemies.w//2
+        if target < game.player.rect.centerx - 8: inputs |= main.INPUT_LEFT
+        elif target > game.player.rect.centerx + 8: inputs |= main.INPUT_RIGHT
+    return inputs
+
+def invaders(frames, seed, dirty, backend="surface", capture=None, **wave):
+    display = main.init_pygame(headless=True, backend=backend)
+    font = pygame.font.Font(None, 28)
+    renderer = main.make_renderer(display, main.load_background(), dirty=dirty)
+    if capture: renderer.capture = Capture(capture, (main.WIDTH, main.HEIGHT), main.FPS, clock=None)
+    game = main.Invaders(seed=seed, **wave)
+    rng = random.Random(seed)
+    phases = Phases()
+    phases.wrap(game, "step", "update")
+    phases.wrap(game, "collide", "collide")
+    game.reset()
+
+    def tick():
+        if game.state!="PLAYING": game.reset()
+        game.step(invaders_bot(game, rng), DT)
+        t = time.perf_counter()
+        game.draw(renderer, font)
+        renderer.present()
+        phases.current["draw"] += time.perf_counter() - t
+
+    extra = run_frames(frames, tick, phases, grid=lambda: game.grid)
+    extra["pools"] = game.pool_stats()
+    if capture:
+        renderer.capture.close()
+        extra["capture"] = renderer.capture.stats()
+    return phases, extra
+
+
+# ───────── Endless runner ─────────
+def runner_bot(game, dash):
+    """Jump blocks and boost through flying enemies"""
+    inputs, player = 0, game.player
+    for obstacle in game.obstacles:
+        if obstacle.type=='block' and 0 < obstacle.x - player.x < 120: inputs |= dash.INPUT_JUMP
+    for enemy in game.flying_enemies:
+        if 0 < enemy.x - player.x < 150: inputs |= dash.INPUT_BOOST
+    return inputs
+
+
+def runner(frames, seed, dirty, backend="surface", capture=None):
+    main.init_pygame(headless=True)
+    import dash
+    game = dash.Game(dirty=dirty, backend=backend, governor=False, seed=seed)
+    if capture:                                # every bench frame is one 60 FPS frame of the video
+        game.renderer.capture = Capture(capture, (dash.SCREEN_WIDTH, dash.SCREEN_HEIGHT), dash.FPS, clock=None)
+    phases = Phases()
+    phases.wrap(game, "update", "update")
+    phases.wrap(game, "check_collisions", "collide")
+
+    def tick():
+        if game.game_over:
+            game.new_game()
+        game.step(runner_bot(game, dash))
+        t = time.perf_counter()
+        game.draw()
+        game.renderer.present()
+        phases.current["draw"] += time.perf_counter() - t
+
+    extra = run_frames(frames, tick, phases, grid=lambda: game.hazards)
+    extra["sounds"] = game.sounds.stats()
+    if capture:
+        game.renderer.capture.close()
+        extra["capture"] = game.renderer.capture.stats()
+    game.music.close()
+    return phases, extra
+
+
+# ───────── Recorded games ─────────
+def replayed(path, dirty, backend="surface"):
+    """Re-run a replay file step for step, drawing every frame"""
+    rep = replay.Replay(path)
+    display = main.init_pygame(headless=True, backend=backend)
+    phases = Phases()
+    if rep.meta["game"]=="runner":
+        import dash
+        game = dash.Game(dirty=dirty, backend=backend, governor=False,
+                         difficulty=rep.meta.get("difficulty", "classic"))
+        phases.wrap(game, "update", "update")
+        draw = lambda: (game.draw(), game.renderer.present())
+    else:
+        font = pygame.font.Font(None, 28)
+        renderer = main.make_renderer(display, main.load_background(), dirty=dirty)
+        game = main.Invaders(**rep.meta.get("options", {}))
+        phases.wrap(game, "step", "update")
+        draw = lambda: (game.draw(renderer, font), renderer.present())
+    phases.wrap(game, "collide" if rep.meta["game"]=="invaders" else "check_collisions", "collide")
+    rep.seek(game, 0)
+    inputs = iter(rep.inputs.tolist())
+
+    def tick():
+        game.step(next(inputs), rep.step_ms)
+        t = time.perf_counter()
+        draw()
+        phases.current["draw"] += time.perf_counter() - t
+
+    grid = (lambda: game.hazards) if rep.meta["game"]=="runner" else (lambda: game.grid)
+    return phases, run_frames(len(rep), tick, phases, grid)
+
+
+SCENARIOS = {
+    "invaders_wave":  lambda a: invaders(a.frames, a.seed, a.dirty, a.backend, a.capture_to),
+    "invaders_storm": lambda a: invaders(a.frames, a.seed, a.dirty, a.backend, a.capture_to, max_bullets=40,
+                                         max_enemy_bullets=40, enemy_fire=0.5),
+    "invaders_large": lambda a: invaders(a.frames, a.seed, a.dirty, a.backend, a.capture_to,
+                                         rows=15, cols=40),
+    "runner_long":    lambda a: runner(a.frames*5, a.seed, a.dirty, a.backend, a.capture_to),
+}
+
+
+def summarize(phases, extra):
+    out = {"frames": len(phases.frames["frame"])}
+    for name, samples in phases.frames.items():
+        ms = np.asarray(samples)
+        out[f"{name}_ms"] = {"mean": float(ms.mean()), "p50": float(np.percentile(ms, 50)),
+                             "p95": float(np.percentile(ms, 95)), "p99": float(np.percentile(ms, 99)),
+                             "max": float(ms.max())}
+    out.update(extra)
+    return out
+
+
+def compare(results, baseline, threshold):
+    """Print p95 frame time changes; returns True if any scenario regressed"""
+    regressed = False
+    for name, res in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old: continue
+        a, b = old["frame_ms"]["p95"], res["frame_ms"]["p95"]
+        change = (b - a)/a if a else 0.0
+        flag = "REGRESSION" if change > threshold else ""
+        regressed |= bool(flag)
+        print(f"{name:16s} p95 {a:7.3f} -> {b:7.3f} ms ({change:+.1%}) {flag}")
+    return regressed
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("--frames", type=int, default=3000, help="frames per invaders scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dirty", action="store_true", help="use dirty-rect rendering")
+    parser.add_argument("--backend", choices=main.BACKENDS, default="surface",
+                        help="renderer backend; software runs the texture path without a GPU")
+    parser.add_argument("--replay", metavar="PATH", action="append", default=[],
+                        help="also benchmark a recorded game (repeatable)")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="also record each scenario's frames (see capture.py), to measure the overhead")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="JSON", help="baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="p95 slowdown counted as a regression (default 10%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown: parser.error(f"unknown scenario {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    results = {
+        "meta": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                 "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "frames": args.frames, "seed": args.seed, "dirty": args.dirty,
+                 "backend": args.backend, "capture": args.capture},
+        "scenarios": {},
+    }
+    runs = {name: SCENARIOS[name] for name in args.scenarios or ([] if args.replay else SCENARIOS)}
+    for path in args.replay:
+        runs[f"replay:{os.path.basename(path)}"] = lambda a, path=path: replayed(path, a.dirty, a.backend)
+    for name, scenario in runs.items():
+        if args.capture:                       # one output per scenario: run.y4m -> run_invaders_wave.y4m
+            stem, ext = os.path.splitext(args.capture.rstrip("/"))
+            args.capture_to = f"{stem}_{name}{ext}"
+        else:
+            args.capture_to = None
+        before = assets.stats()
+        res = summarize(*scenario(args))
+        res["assets"] = {k: v - before[k] for k, v in assets.stats().items()}   # cache work this scenario caused
+        results["scenarios"][name] = res
+        f = res["frame_ms"]
+        print(f"{name:16s} p50 {f['p50']:7.3f}  p95 {f['p95']:7.3f}  p99 {f['p99']:7.3f} ms"
+              f"  gc {res['gc_collections']}"
+              + (f"  cand/f {res['broad_phase']['candidates']:6.1f}" if "broad_phase" in res else "")
+              + f"  assets {res['assets']['hits']} hit/{res['assets']['misses']} miss"
+              + (f"  captured {res['capture']['written']}/{res['capture']['frames']}" if "capture" in res else ""))
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            if compare(results, json.load(fh), args.threshold): sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,185 @@
+"""Asset build: sound effects and pre-scaled sprites, redone only when their inputs change.
+
+    python build_assets.py                  # build whatever is out of date
+    python build_assets.py --force          # rebuild everything
+    python build_assets.py --only sounds    # just the WAVs (what generate_sounds.py runs)
+
+Every manifest entry (a sound spec, or an image at one size) is hashed with
+its source bytes; entries whose hash matches .asset_cache.json and whose
+output exists are skipped, and the rest render across a process pool.
+Sounds go to sounds/ as WAVs in the mixer's own format (synth.MIXER), so
+loading them needs no conversion.  Images with alpha are scaled and packed
+into build/sprites.png and opaque ones (backgrounds) get a file each;
+build/sprites.json indexes both, and assets.py loads from it instead of
+scaling at runtime.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from assets import BUILD_DIR, BUILD_INDEX
+from generate_sounds import SOUNDS, save_sound
+from synth import MIXER, render, to_int16
+
+CACHE = ".asset_cache.json"
+SOUND_DIR = "sounds"
+SHEET = "sprites.png"
+SHEET_WIDTH = 512
+
+
+def manifest():
+    """Every (path, size, alpha) image variant main.py and dash.py load"""
+    import dash, main                            # dash starts pygame on import
+    return list(dict.fromkeys(main.IMAGES + dash.IMAGES))
+
+
+def digest(params, *sources):
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    for path in sources:
+        with open(path, "rb") as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+
+# ───────── workers (run in the pool) ─────────
+def render_sound(job):
+    name, spec = job
+    rate, _, channels = MIXER
+    wave = to_int16(render(spec, rate))
+    save_sound(np.repeat(wave[:, None], channels, axis=1), os.path.join(SOUND_DIR, name), rate)
+    return name
+
+def scale_image(job):
+    """(size, RGBA bytes) of path scaled to size"""
+    path, size = job
+    surf = pygame.image.load(path)
+    if surf.get_size()!=tuple(size): surf = pygame.transform.scale(surf, size)
+    return surf.get_size(), pygame.image.tobytes(surf, "RGBA")
+
+def save_image(job):
+    path, size, out = job
+    surf = pygame.image.load(path)
+    if surf.get_size()!=tuple(size): surf = pygame.transform.scale(surf, size)
+    pygame.image.save(surf, out)
+    return out
+
+
+def pack(sizes, width=SHEET_WIDTH):
+    """Shelf-pack (w, h) boxes, tallest first; returns each one's (x, y) and the sheet height"""
+    spots = [None]*len(sizes)
+    x = y = shelf = 0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[i]
+        if x + w > width: x, y, shelf = 0, y + shelf, 0
+        spots[i] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return spots, y + shelf
+
+
+def variant_file(path, size):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}_{size[0]}x{size[1]}.png"
+
+
+def build(force=False, only=None, jobs=None):
+    """Bring sounds and/or images up to date; returns (built, skipped) counts"""
+    try:
+        with open(CACHE) as fh:
+            cache = {} if force else json.load(fh)
+    except (OSError, ValueError):
+        cache = {}
+    todo, new = [], {}                                   # (kind, job), key -> hash
+    skipped = 0
+    def stale(key, h, *outputs):
+        new[key] = h
+        return cache.get(key)!=h or not all(os.path.exists(o) for o in outputs)
+
+    if only in (None, "sounds"):
+        os.makedirs(SOUND_DIR, exist_ok=True)
+        for name, spec in SOUNDS.items():
+            if stale(f"sound:{name}", digest([spec, MIXER], "synth.py"), os.path.join(SOUND_DIR, name)):
+                todo.append((render_sound, (name, spec)))
+            else:
+                skipped += 1
+
+    sheet_jobs, index = [], None
+    if only in (None, "images"):
+        os.makedirs(BUILD_DIR, exist_ok=True)
+        images = [(p, tuple(s), a) for p, s, a in manifest() if os.path.exists(p)]
+        sprites = [(p, s) for p, s, a in images if a]
+        h = digest(sprites, *sorted({p for p, _ in sprites}))
+        if stale("sheet", h, os.path.join(BUILD_DIR, SHEET)):
+            sheet_jobs = sprites
+        else:
+            skipped += 1
+        for path, size, alpha in images:
+            if alpha: continue
+            out = os.path.join(BUILD_DIR, variant_file(path, size))
+            if stale(f"image:{out}", digest([size], path), out):
+                todo.append((save_image, (path, size, out)))
+            else:
+                skipped += 1
+        index = {
+            "sources": {p: [os.stat(p).st_mtime_ns, os.stat(p).st_size] for p in {p for p, _, _ in images}},
+            "variants": [[p, s, a, SHEET if a else variant_file(p, s)] for p, s, a in images],
+        }
+
+    jobs = jobs or os.cpu_count() or 1
+    work = [(fn, job) for fn, job in todo] + [(scale_image, job) for job in sheet_jobs]
+    if jobs==1 or len(work)<2:
+        results = [fn(job) for fn, job in work]
+    else:
+        # spawn, not fork: no worker inherits the parent's SDL state
+        with multiprocessing.get_context("spawn").Pool(min(jobs, len(work))) as pool:
+            pending = [pool.apply_async(fn, (job,)) for fn, job in work]
+            results = [p.get() for p in pending]
+            pool.close()
+            pool.join()
+
+    if sheet_jobs:
+        scaled = results[len(todo):]
+        spots, height = pack([size for size, _ in scaled])
+        sheet = pygame.Surface((SHEET_WIDTH, height), pygame.SRCALPHA)
+        for (size, pixels), spot in zip(scaled, spots):
+            sheet.blit(pygame.image.frombytes(pixels, size, "RGBA"), spot)
+        pygame.image.save(sheet, os.path.join(BUILD_DIR, SHEET))
+        new["sheet_rects"] = {f"{p}@{s[0]}x{s[1]}": [*spot, *size]
+                              for (p, s), (size, _), spot in zip(sheet_jobs, scaled, spots)}
+    elif "sheet" in new:
+        new["sheet_rects"] = cache.get("sheet_rects", {})
+
+    if index is not None:
+        rects = new["sheet_rects"]
+        for v in index["variants"]:
+            v.append(rects.get(f"{v[0]}@{v[1][0]}x{v[1][1]}") if v[2] else None)
+        index["variants"] = [v for v in index["variants"] if not v[2] or v[4]]
+        with open(BUILD_INDEX, "w") as fh:
+            json.dump(index, fh)
+    with open(CACHE, "w") as fh:
+        json.dump({**cache, **new}, fh, indent=1)
+    return len(work) - len(sheet_jobs) + bool(sheet_jobs), skipped
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="rebuild everything, ignoring the cache")
+    parser.add_argument("--only", choices=("sounds", "images"), help="build just one kind of asset")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+    t = time.perf_counter()
+    built, skipped = build(args.force, args.only, args.jobs)
+    print(f"built {built}, up to date {skipped} ({time.perf_counter() - t:.2f} s)")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,174 @@
+"""Gameplay capture: presented frames copied into a ring of buffers and encoded off-thread.
+
+    python dash.py --capture frames/            # numbered PNGs in a directory
+    python main.py --capture run.y4m            # one YUV4MPEG2 stream (ffmpeg, mpv, VLC)
+    python main.py --capture run.rgb            # raw RGB24 frames, back to back
+
+A Y4M turns into an MP4 with `ffmpeg -i run.y4m run.mp4`; raw frames need
+`-f rawvideo -pix_fmt rgb24 -s WxH -r 60` in front of `-i`.
+
+Output always runs at the declared fps, whatever rate frames are presented
+at: frames are placed by the time they were grabbed, so a frame shown longer
+(an idle screen) is repeated and frames presented faster than fps (the
+pipelined mode's --render-fps) are skipped before they are copied.
+"""
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pygame
+
+
+def format_for(path):
+    """Output format from the path: .y4m, .rgb/.raw, anything else is a PNG directory"""
+    ext = os.path.splitext(path)[1].lower()
+    return "y4m" if ext==".y4m" else "raw" if ext in (".rgb", ".raw") else "png"
+
+
+def yuv420(pix, order):
+    """Full-range BT.601 Y, U, V planes of (H, W, 4) pixels, chroma averaged over 2x2.
+
+    order is the byte offset of red, green and blue.  Fixed point in
+    uint16/int32, which is several times faster than floats.  An odd width
+    or height has its last column or row repeated for the chroma, which is
+    then (W+1)//2 by (H+1)//2 as Y4M expects.
+    """
+    h, w = pix.shape[:2]
+    if h%2 or w%2: pix = np.pad(pix, ((0, h%2), (0, w%2), (0, 0)), mode="edge")
+    r, g, b = (pix[..., i].astype(np.uint16) for i in order)
+    y = r[:h, :w]*77; y += g[:h, :w]*150; y += b[:h, :w]*29; y += 128; y >>= 8
+    quad = lambda p: (p[0::2, 0::2] + p[1::2, 0::2] + p[0::2, 1::2] + p[1::2, 1::2]).astype(np.int32)
+    r, g, b = quad(r), quad(g), quad(b)                # sums of four, up to 1020
+    u = ((-43*r - 85*g + 128*b + 512) >> 10) + 128
+    v = ((128*r - 107*g - 21*b + 512) >> 10) + 128
+    return [y.astype(np.uint8), np.clip(u, 0, 255).astype(np.uint8), np.clip(v, 0, 255).astype(np.uint8)]
+
+
+class Capture:
+    """Records every presented frame without stalling the game loop.
+
+    grab(surface) copies the frame's raw pixel rows into the next free
+    buffer of a preallocated ring and hands its index to a worker thread,
+    which converts and encodes it and gives the buffer back.  A straight
+    row copy costs a fraction of a millisecond, where surfarray.pixels3d's
+    strided RGB copy costs several.  When every buffer is still waiting on
+    the encoder the frame is dropped and counted rather than blocking.
+    close() drains the ring and finishes the file.
+
+    clock() (seconds) places each grab in the output's fps timeline; gaps
+    are filled by repeating the previous frame and a grab more than half a
+    frame early is skipped.  With clock None every grab is the next output
+    frame, for callers that step time themselves (bench.py).
+    """
+    def __init__(self, path, size, fps=60, fmt=None, ring=8, clock=time.perf_counter):
+        self.path, self.size, self.fps, self.clock = path, tuple(size), fps, clock
+        self.fmt = fmt or format_for(path)
+        w, h = self.size
+        self.buffers = np.zeros((ring, h, w, 4), np.uint8)
+        self.free = queue.Queue()
+        for i in range(ring): self.free.put(i)
+        self.ready = queue.Queue()
+        self.frames = self.dropped = self.written = self.skipped = self.repeated = 0
+        self.start = None                      # clock() at the first grab
+        self.next = 0                          # first output frame not yet handed out
+        self.out_frames = 0                    # output frames written, repeats included
+        if self.fmt=="png":
+            os.makedirs(path, exist_ok=True)
+            self.out = None
+        else:
+            self.out = open(path, "wb")
+            if self.fmt=="y4m":
+                self.out.write(f"YUV4MPEG2 W{w} H{h} F{fps}:1 Ip A1:1 C420jpeg\n".encode())
+        self.worker = threading.Thread(target=self.encode, daemon=True)
+        self.worker.start()
+
+    def slot(self):
+        """Output frame number for a grab now, or None if it's too early for one"""
+        if self.clock is None:
+            slot = self.next
+        else:
+            now = self.clock()
+            if self.start is None: self.start = now
+            at = (now - self.start)*self.fps
+            if at < self.next - 0.5: return None
+            slot = max(self.next, round(at))
+        self.next = slot + 1
+        return slot
+
+    def grab(self, surface):
+        self.frames += 1
+        slot = self.slot()
+        if slot is None:
+            self.skipped += 1                  # presented faster than fps
+            return False
+        try:
+            i = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1                  # the encoder is behind; the last frame is repeated instead
+            return False
+        w, h = self.size
+        buf = self.buffers[i].reshape(h, w*4)
+        if surface.get_bytesize()==4:
+            rows = np.frombuffer(surface.get_buffer(), np.uint8).reshape(h, surface.get_pitch())
+            np.copyto(buf, rows[:, :w*4])
+            order = tuple(shift//8 if sys.byteorder=="little" else 3 - shift//8
+                          for shift in surface.get_shifts()[:3])
+        else:                                  # 8/16/24-bit surfaces: let SDL convert
+            buf[...] = np.frombuffer(pygame.image.tobytes(surface, "RGBX"), np.uint8).reshape(h, w*4)
+            order = 0, 1, 2
+        self.ready.put((slot, i, order))
+        return True
+
+    def encode(self):
+        if hasattr(os, "setpriority"):           # Linux: niceness is per thread
+            try: os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+            except OSError: pass
+        last = None
+        while True:
+            slot, i, order = self.ready.get()
+            while last is not None and self.out_frames < slot:
+                self.emit(last)
+                self.repeated += 1
+            if i is None: return               # close(): filled up to the end
+            pix = self.buffers[i]
+            if self.fmt=="y4m":
+                frame = b"FRAME\n" + b"".join(plane.tobytes() for plane in yuv420(pix, order))
+            else:
+                frame = pix[..., list(order)].tobytes()
+                if self.fmt=="png": frame = pygame.image.frombuffer(frame, self.size, "RGB")
+            self.free.put(i)
+            last = self.emit(frame)
+            self.written += 1
+
+    def emit(self, frame):
+        """Write the next output frame: Y4M/raw bytes, or for PNGs a Surface or the
+        file of one already written; returns what repeats it"""
+        if self.fmt=="png":
+            path = os.path.join(self.path, f"frame_{self.out_frames + 1:06d}.png")
+            if isinstance(frame, str): shutil.copyfile(frame, path)
+            else: pygame.image.save(frame, path)
+            frame = path
+        else:
+            self.out.write(frame)
+        self.out_frames += 1
+        return frame
+
+    def stats(self):
+        return {"frames": self.frames, "written": self.written, "dropped": self.dropped,
+                "skipped": self.skipped, "repeated": self.repeated}
+
+    def close(self):
+        """Finish the file, the last frame lasting until now"""
+        end = self.next
+        if self.clock is not None and self.start is not None:
+            end = max(end, round((self.clock() - self.start)*self.fps))
+        self.ready.put((end, None, None))
+        self.worker.join()
+        if self.out: self.out.close()
+        s = self.stats()
+        print(f"capture: {self.out_frames} frames at {self.fps} fps to {self.path} ({s['written']} grabbed, "
+              f"{s['repeated']} repeats, {s['skipped']} skipped, {s['dropped']} dropped)", file=sys.stderr)
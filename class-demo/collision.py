@@ -0,0 +1,198 @@
+import numpy as np
+import pygame
+
+# Per-channel distance from an opaque sprite's backdrop color that still counts as backdrop
+BACKGROUND_THRESHOLD = 24
+
+_masks = {}
+_overlays = {}
+
+
+def mask(surface):
+    """Pixel mask of surface, made once per surface.
+
+    Sprites share their scaled images through the asset cache, so this is
+    one mask per image variant.  Only for images that never change.
+    """
+    m = _masks.get(surface)
+    if m is None:
+        m = _masks[surface] = silhouette(surface)
+    return m
+
+
+def silhouette(surface, threshold=BACKGROUND_THRESHOLD):
+    """Mask of surface's opaque pixels, or for an opaque image, of everything but its backdrop.
+
+    The sprites are opaque PNGs drawn on a flat background, so their alpha
+    masks are full rectangles.  For those the backdrop is taken to be the
+    commonest border color: every pixel within threshold of it that is
+    connected to the border is left out, and so are leftover specks under
+    1% of the image.  An image that is all backdrop (a plain bullet) keeps
+    its full mask.
+    """
+    if surface.get_flags() & pygame.SRCALPHA and pygame.surfarray.pixels_alpha(surface).min()<255:
+        return pygame.mask.from_surface(surface)
+    w, h = surface.get_size()
+    rgb = pygame.surfarray.array3d(surface)                 # indexed [x, y]
+    border = np.concatenate([rgb[0], rgb[-1], rgb[:, 0], rgb[:, -1]])
+    colors, counts = np.unique(border, axis=0, return_counts=True)
+    backdrop = pygame.mask.from_threshold(surface, tuple(colors[counts.argmax()]), (threshold,)*3 + (255,))
+    edge = pygame.mask.Mask((w, h))
+    edge.draw(pygame.mask.Mask((w, h), fill=True), (0, 0))
+    edge.erase(pygame.mask.Mask((max(w - 2, 0), max(h - 2, 0)), fill=True), (1, 1))
+    shape = pygame.mask.Mask((w, h), fill=True)
+    for part in backdrop.connected_components():
+        if part.overlap(edge, (0, 0)): shape.erase(part, (0, 0))
+    kept = pygame.mask.Mask((w, h))
+    for part in shape.connected_components(max(1, w*h//100)):   # drop specks left in the corners
+        kept.draw(part, (0, 0))
+    return kept if kept.count() else pygame.mask.Mask((w, h), fill=True)
+
+
+def collide_mask(a, b):
+    """Pixel-exact hit test for objects with .rect and .image.
+
+    The rects are checked first, so the masks are only compared for the
+    few pairs that overlap; usable as the collided callback of
+    SpatialHash and pygame.sprite collide functions.
+    """
+    if not a.rect.colliderect(b.rect): return False
+    return mask(a.image).overlap(mask(b.image), (b.rect.x - a.rect.x, b.rect.y - a.rect.y)) is not None
+
+
+def mask_overlay(surface, color=(255, 0, 255, 140)):
+    """surface's mask as a translucent surface, for showing hit areas while debugging"""
+    overlay = _overlays.get(surface)
+    if overlay is None:
+        overlay = _overlays[surface] = mask(surface).to_surface(setcolor=color, unsetcolor=None)
+    return overlay
+
+
+class SpatialHash:
+    """Uniform-grid broad phase for anything with a .rect (sprites or not).
+
+    Each object is filed under every cell its rect touches.  move() only
+    re-files an object when it crosses a cell boundary, and queries look at
+    the cells under the query rect, so the cost of a test follows how crowded
+    that part of the screen is rather than how many objects exist.
+
+    spritecollide()/groupcollide() behave like the pygame.sprite functions of
+    the same name: optional dokill (which also unregisters the object) and an
+    optional collided(a, b) callback, rect overlap by default.  Results come
+    back in registration order so runs stay deterministic.
+    """
+    def __init__(self, cell=64):
+        self.cell    = cell
+        self.cells   = {}             # (cx, cy) -> {obj: None}
+        self.objects = {}             # obj -> [span, seq]
+        self.seq     = 0
+        self.queries = self.candidates = self.hits = 0
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, obj):
+        return obj in self.objects
+
+    def span(self, rect):
+        c = self.cell
+        return (rect.left//c, rect.top//c,
+                max(rect.left, rect.right-1)//c, max(rect.top, rect.bottom-1)//c)
+
+    @staticmethod
+    def keys(span):
+        x0, y0, x1, y1 = span
+        return [(x, y) for y in range(y0, y1+1) for x in range(x0, x1+1)]
+
+    # ─── registration ───
+    def insert(self, obj):
+        if obj in self.objects: return self.move(obj)
+        span = self.span(obj.rect)
+        self.objects[obj] = [span, self.seq]; self.seq += 1
+        for key in self.keys(span):
+            self.cells.setdefault(key, {})[obj] = None
+
+    def remove(self, obj):
+        entry = self.objects.pop(obj, None)
+        if entry is None: return
+        for key in self.keys(entry[0]):
+            self._unfile(key, obj)
+
+    def move(self, obj):
+        """Call after obj.rect changes; cheap when it stays in the same cells"""
+        entry = self.objects[obj]
+        span = self.span(obj.rect)
+        if span==entry[0]: return
+        old, new = set(self.keys(entry[0])), self.keys(span)
+        for key in old.difference(new):
+            self._unfile(key, obj)
+        for key in new:
+            if key not in old: self.cells.setdefault(key, {})[obj] = None
+        entry[0] = span
+
+    def clear(self):
+        self.cells.clear(); self.objects.clear()
+
+    def _unfile(self, key, obj):
+        cell = self.cells[key]
+        del cell[obj]
+        if not cell: del self.cells[key]
+
+    # ─── queries ───
+    def query(self, rect):
+        """Objects sharing a cell with rect (candidates, not confirmed hits)"""
+        found = {}
+        cells = self.cells
+        for key in self.keys(self.span(rect)):
+            cell = cells.get(key)
+            if cell: found.update(cell)
+        self.queries += 1
+        self.candidates += len(found)
+        if len(found)<2: return list(found)
+        objects = self.objects
+        return sorted(found, key=lambda o: objects[o][1])
+
+    def spritecollide(self, sprite, dokill=False, collided=None):
+        hits = [o for o in self.query(sprite.rect)
+                if (collided(sprite, o) if collided else sprite.rect.colliderect(o.rect))]
+        self.hits += len(hits)
+        if dokill:
+            for o in hits:
+                self.remove(o)
+                if hasattr(o, "kill"): o.kill()
+        return hits
+
+    def groupcollide(self, group, dokilla, dokillb, collided=None):
+        crashed = {}
+        for sprite in list(group):
+            hits = self.spritecollide(sprite, dokillb, collided)
+            if hits:
+                crashed[sprite] = hits
+                if dokilla: sprite.kill()
+        return crashed
+
+    def frame_stats(self):
+        """Counters since the last call: queries, candidate pairs tested, hits"""
+        stats = {"objects": len(self.objects), "cells": len(self.cells), "queries": self.queries,
+                 "candidates": self.candidates, "hits": self.hits}
+        self.queries = self.candidates = self.hits = 0
+        return stats
+
+
+def check():
+    """Slide a runner block diagonally into the player; a rect overlap before the first
+    mask hit is a near miss that rects alone would have called a crash"""
+    from types import SimpleNamespace
+    from assets import assets
+    player = SimpleNamespace(image=assets.image("player1.png", (50, 50)), rect=pygame.Rect(0, 0, 50, 50))
+    block = SimpleNamespace(image=assets.image("bad.png", (40, 70)), rect=pygame.Rect(0, 0, 40, 70))
+    for d in range(1, 40):
+        block.rect.topleft = 50 - d, 50 - d
+        if collide_mask(player, block): break
+    print(f"player {mask(player.image).count()}/2500 px, block {mask(block.image).count()}/2800 px in their masks")
+    print(f"rects overlap by {d - 1}x{d - 1} px before the masks touch (first hit at {d}x{d})")
+    return d>1
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if check() else 1)
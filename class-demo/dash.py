@@ -1,10 +1,31 @@
+import argparse
+from collections import deque, namedtuple
+import itertools
 import math  # New: Import math for sine wave movement
 import random
 import sys
 
+import numpy as np
 import pygame
 
-# Initialize Pygame
+from assets import assets
+from capture import Capture
+from collision import SpatialHash, collide_mask, mask_overlay
+import levels
+from music import MusicStream
+from particles import Particles
+import pipeline
+from pools import Pool
+from profiler import profiler
+import quality
+import replay
+from render import BACKENDS, make_renderer, open_display
+from soundbank import SoundBank
+from synth import MIXER
+from textcache import text
+
+# Initialize Pygame, with the mixer in the format build_assets.py writes the WAVs in
+pygame.mixer.pre_init(*MIXER)
 pygame.init()
 
 # Constants
@@ -30,21 +51,61 @@ GRAVITY = 0.9
 BOOST_DURATION = 500  # milliseconds
 BOOST_COOLDOWN = 3000  # milliseconds
 BOOST_SPEED = 20
+TRAIL_LENGTH = 10  # frames a boost trail copy lingers
+FRAME_MS = 1000 // FPS  # one update step; Clock.tick(60) paces frames at 16 ms too
+
+# Keys pressed since the last step, as a bitmask (same bits as main.py and replay.py)
+INPUT_JUMP, INPUT_BOOST = 4, 8
 
 # Flying Enemy settings
 FLYING_ENEMY_SIZE = 40
 FLYING_ENEMY_SPEED = 7
 FLYING_ENEMY_AMPLITUDE = 100 # How high up and down it moves
 FLYING_ENEMY_FREQUENCY = 0.02 # How fast it moves up and down
+FLYING_ENEMY_SPAWN_TIME = 4000  # milliseconds
 
 # Obstacle settings
 OBSTACLE_WIDTH = 40
 OBSTACLE_HEIGHT = 70
 OBSTACLE_SPEED = 10
 OBSTACLE_SPAWN_TIME = 1300  # milliseconds
+HOLE_CHANCE = 0.3  # Share of obstacles that are holes rather than blocks
+
+# Every sound effect: file, channel group, max voices at once, min ms between starts
+SOUNDS = {
+    'jump': ('shoot.wav', 'player', 1, 100),
+    'boost': ('invader_shoot.wav', 'player', 1, 250),
+    'hit': ('hit.wav', 'impact', 1, 250),
+    'game_over': ('game_over.wav', 'ui', 1, 1000),
+}
+CHANNELS = {'player': 2, 'impact': 1, 'ui': 1} # Channel 0 is the music's
+
+# Difficulty curves for the level generator; classic keeps the spawn settings above
+DIFFICULTIES = {
+    "classic": {},
+    "ramp": {  # Spawns come faster and holes more often over the first two minutes
+        "spawn_time": levels.ramp(OBSTACLE_SPAWN_TIME, 800, 120000),
+        "enemy_spawn_time": levels.ramp(FLYING_ENEMY_SPAWN_TIME, 2500, 120000),
+        "hole_chance": levels.ramp(HOLE_CHANCE, 0.45, 120000),
+    },
+}
+
+# Every image variant the game uses, loaded once before play starts
+IMAGES = [
+    ('player1.png', (PLAYER_SIZE, PLAYER_SIZE), True),
+    ('bad.png', (OBSTACLE_WIDTH, OBSTACLE_HEIGHT), True),  # Blocks
+    ('bad.png', (70, OBSTACLE_HEIGHT), True),  # Holes
+    ('bad.png', (FLYING_ENEMY_SIZE, FLYING_ENEMY_SIZE), True),
+    ('background.png', (SCREEN_WIDTH, SCREEN_HEIGHT), False),
+]
+
+# What drawing needs from one step, for the pipelined mode (see pipeline.py). Obstacle rows are
+# (id, x, hole) and enemy rows (id, x, y); the trail is the player's Particles.view()
+View = namedtuple("View", "game score game_over player boosting cooldown trail obstacles enemies")
+serials = itertools.count() # Ids that stay with an obstacle or enemy while it's on screen
 
 class Player:
-    def __init__(self):
+    def __init__(self, sounds, get_ticks):
         self.size = PLAYER_SIZE
         self.x = PLAYER_X
         self.y = SCREEN_HEIGHT - GROUND_HEIGHT - self.size
@@ -56,33 +117,36 @@ class Player:
         self.is_boosting = False
         self.boost_start_time = 0
         self.last_boost_time = -BOOST_COOLDOWN  # Allow boost from start
-        self.boost_trail = []  # For visual effect
-        self.image = pygame.image.load('player1.png').convert_alpha() # Load player image
-        self.image = pygame.transform.scale(self.image, (self.size, self.size))
+        self.sounds = sounds
+        self.get_ticks = get_ticks # The game's clock, for boost timing
+        self.image = assets.image('player1.png', (self.size, self.size)) # Shared player image
+        # Boost trail: fading copies of the player, drawn from a pre-faded alpha ramp
+        self.boost_trail = Particles(capacity=TRAIL_LENGTH, levels=TRAIL_LENGTH)
+        self.trail_sprite = self.boost_trail.sprite(self.image, max_alpha=225)
     
     def jump(self):
         if not self.is_jumping:
             self.velocity_y = JUMP_VELOCITY
             self.is_jumping = True
-            pygame.mixer.Sound('sounds/shoot.wav').play() # Play jump sound
+            self.sounds.play('jump') # Play jump sound
     
     def boost(self):
-        current_time = pygame.time.get_ticks()
+        current_time = self.get_ticks()
         if current_time - self.last_boost_time >= BOOST_COOLDOWN and not self.is_boosting:
             self.is_boosting = True
             self.boost_start_time = current_time
             self.last_boost_time = current_time
-            pygame.mixer.Sound('sounds/invader_shoot.wav').play() # Play boost sound
+            self.sounds.play('boost') # Play boost sound
     
     def update(self):
+        self.boost_trail.update(FRAME_MS)
         # Handle boost
         if self.is_boosting:
-            current_time = pygame.time.get_ticks()
+            current_time = self.get_ticks()
             if current_time - self.boost_start_time < BOOST_DURATION:
                 # Add to trail for visual effect
-                self.boost_trail.append((self.x, self.y))
-                if len(self.boost_trail) > 10:
-                    self.boost_trail.pop(0)
+                self.boost_trail.emit_one(self.rect.centerx, self.rect.centery, self.trail_sprite,
+                                          life=(TRAIL_LENGTH - 0.5)*FRAME_MS)
                 
                 # Move forward during boost
                 self.x += BOOST_SPEED
@@ -115,14 +179,7 @@ class Player:
     
     def draw(self, screen):
         # Draw boost trail
-        for i, (trail_x, trail_y) in enumerate(self.boost_trail):
-            alpha = i * 25  # Fade effect
-            trail_color = (*BLUE, alpha) if self.is_boosting else (*WHITE, alpha)
-            trail_rect = pygame.Rect(trail_x, trail_y, self.size, self.size)
-            # Draw faded trail images
-            trail_image = self.image.copy()
-            trail_image.set_alpha(alpha)
-            screen.blit(trail_image, trail_rect)
+        self.boost_trail.draw(screen)
         
         # Draw player (different color when boosting)
         # color = BLUE if self.is_boosting else WHITE # No longer needed with image
@@ -131,18 +188,24 @@ class Player:
         
         # Draw boost effect
         if self.is_boosting:
-            pygame.draw.rect(screen, YELLOW, self.rect, 3)
+            screen.draw_rect(YELLOW, self.rect, 3)
 
 class Obstacle:
     def __init__(self, type='block'):
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.spawn(type)
+    
+    def spawn(self, type='block'):
+        # Reset in place so pooled obstacles can be reused
         self.type = type
         self.width = OBSTACLE_WIDTH if type == 'block' else 70  # Wider for holes
         self.height = OBSTACLE_HEIGHT
         self.x = SCREEN_WIDTH
         self.y = SCREEN_HEIGHT - GROUND_HEIGHT - self.height if type == 'block' else SCREEN_HEIGHT - GROUND_HEIGHT
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        self.image = pygame.image.load('bad.png').convert_alpha() # Load obstacle image
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
+        self.rect.update(self.x, self.y, self.width, self.height)
+        self.image = assets.image('bad.png', (self.width, self.height)) # Shared obstacle image
+        self.serial = next(serials)
+        return self
     
     def update(self):
         self.x -= OBSTACLE_SPEED
@@ -160,14 +223,20 @@ class Obstacle:
 class FlyingEnemy:
     def __init__(self):
         self.size = FLYING_ENEMY_SIZE
+        self.velocity_x = FLYING_ENEMY_SPEED
+        self.rect = pygame.Rect(0, 0, self.size, self.size)
+        self.image = assets.image('bad.png', (self.size, self.size)) # Shared flying enemy image
+        self.x = self.y = self.initial_y = self.time = 0
+    
+    def spawn(self, y):
+        # Reset in place so pooled enemies can be reused
         self.x = SCREEN_WIDTH
-        self.initial_y = random.randint(SCREEN_HEIGHT // 4, SCREEN_HEIGHT // 2) # Random starting height
+        self.initial_y = y # Starting height, picked by the level generator
         self.y = self.initial_y
-        self.velocity_x = FLYING_ENEMY_SPEED
-        self.rect = pygame.Rect(self.x, self.y, self.size, self.size)
+        self.rect.topleft = (self.x, self.y)
         self.time = 0 # For sine wave movement
-        self.image = pygame.image.load('bad.png').convert_alpha() # Load flying enemy image
-        self.image = pygame.transform.scale(self.image, (self.size, self.size))
+        self.serial = next(serials)
+        return self
     
     def update(self):
         self.x -= self.velocity_x
@@ -188,48 +257,96 @@ class FlyingEnemy:
         return self.x + self.size < 0
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Endless Runner - Speed Boost Edition")
+    def __init__(self, dirty=False, backend="surface", governor=True, seed=None, record=None,
+                 difficulty="classic", show_masks=False, capture=None):
+        self.display = open_display((SCREEN_WIDTH, SCREEN_HEIGHT), backend,
+                                    "Endless Runner - Speed Boost Edition")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
-        self.reset_game()
-        pygame.mixer.music.load('sounds/background_music.wav') # Load background music
-        pygame.mixer.music.play(-1) # Play in a loop
-        self.background_image = pygame.image.load('background.png').convert() # Load background image
-        self.background_image = pygame.transform.scale(self.background_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-    
-    def reset_game(self):
-        self.player = Player()
-        self.obstacles = []
-        self.flying_enemies = [] # New: List to hold flying enemies
+        assets.preload(IMAGES) # Decode and scale every image up front, not mid-game
+        # Obstacles and enemies are recycled instead of allocated every spawn
+        self.obstacle_pool = Pool(lambda pool: Obstacle(), 8)
+        self.flying_enemy_pool = Pool(lambda pool: FlyingEnemy(), 4)
+        self.trail_detail = 1.0 # Lowered by the quality governor under load
+        self.seeds = random.Random(seed) # Every game gets its own seed, for replays
+        self.difficulty = difficulty
+        self.show_masks = show_masks # Debug view: draw the pixel masks hits are tested with
+        self.sounds = SoundBank(SOUNDS, CHANNELS) # Effects decoded once, never loaded mid-game
+        self.level_seed = 0
+        self.record_path = record
+        self.recorder = None
+        self.inputs = 0
+        self.paused = False
+        self.redraw = True # The pause and game over screens are only drawn again when this is set
+        self.new_game()
+        self.music = MusicStream() # Procedural background music on its own channel
+        self.music.play()
+        self.background_image = assets.image('background.png', (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
+        # All drawing goes through the renderer, which blits like a Surface but tracks rects
+        self.renderer = make_renderer(self.display, self.background_image, dirty=dirty)
+        if capture:
+            self.renderer.capture = Capture(capture, (SCREEN_WIDTH, SCREEN_HEIGHT), FPS) # Records every frame shown
+        # Under load the governor sheds effects instead of letting the game slow down
+        self.dirty = dirty
+        self.plain_background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.plain_background.fill(BLACK)
+        self.governor = quality.Governor(FPS) if governor else None
+    
+    def new_game(self):
+        """Start a fresh game with a new seed, recording it if asked to"""
+        seed = self.seeds.randrange(2**32)
+        self.reset_game(seed)
+        if self.record_path:
+            self.recorder = replay.Recorder(self, seed, FRAME_MS,
+                                            {"game": "runner", "difficulty": self.difficulty})
+    
+    def reset_game(self, seed=None):
+        if seed is not None:
+            self.level_seed = seed
+        # Obstacles and enemies come from a layout generated ahead of the player
+        self.level = levels.Level(self.level_seed, FRAME_MS,
+                                  **{"spawn_time": OBSTACLE_SPAWN_TIME,
+                                     "enemy_spawn_time": FLYING_ENEMY_SPAWN_TIME,
+                                     "hole_chance": HOLE_CHANCE,
+                                     **DIFFICULTIES[self.difficulty]},
+                                  enemy_y=(SCREEN_HEIGHT // 4, SCREEN_HEIGHT // 2))
+        self.game_time = 0 # Game time restarts with each game
+        self.frame = 0
+        self.obstacle_pool.release_all()
+        self.flying_enemy_pool.release_all()
+        self.player = Player(self.sounds, self.get_ticks)
+        self.player.boost_trail.detail = self.trail_detail
+        self.obstacles = deque() # In scroll order, so the first is always the next off screen
+        self.flying_enemies = deque() # New: Flying enemies, also in scroll order
+        self.hazards = SpatialHash(cell=100) # Blocks and flying enemies the player can hit
         self.score = 0
         self.game_over = False
-        self.last_obstacle_spawn = pygame.time.get_ticks()
-        self.last_flying_enemy_spawn = pygame.time.get_ticks() # New: Track last enemy spawn
-        self.start_time = pygame.time.get_ticks()
-    
-    def spawn_obstacle(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_obstacle_spawn > OBSTACLE_SPAWN_TIME:
-            # Randomly spawn a block or a hole
-            if random.random() < 0.3:  # 30% chance for a hole
-                self.obstacles.append(Obstacle(type='hole'))
-            else:
-                self.obstacles.append(Obstacle(type='block'))
-            self.last_obstacle_spawn = current_time
+        self.start_time = self.get_ticks()
+    
+    def get_ticks(self):
+        # Game time in ms, advanced FRAME_MS per step rather than read from the wall clock;
+        # with the seeded level layout a game replays exactly from its seed and inputs
+        return self.game_time
     
-    def spawn_flying_enemy(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_flying_enemy_spawn > 4000:  # Spawn every 4 seconds
-            self.flying_enemies.append(FlyingEnemy())
-            self.last_flying_enemy_spawn = current_time
+    def spawn_due(self):
+        # Spawn whatever the level has laid out up to now
+        for _, kind, y in self.level.due(self.get_ticks()):
+            if kind == levels.ENEMY:
+                enemy = self.flying_enemy_pool.acquire().spawn(y)
+                self.flying_enemies.append(enemy)
+                self.hazards.insert(enemy)
+            elif kind == levels.HOLE:
+                self.obstacles.append(self.obstacle_pool.acquire().spawn(type='hole'))
+            else:
+                obstacle = self.obstacle_pool.acquire().spawn(type='block')
+                self.obstacles.append(obstacle)
+                self.hazards.insert(obstacle)
     
     def update_score(self):
         if not self.game_over:
             # Update score based on time (100 points per second)
-            current_time = pygame.time.get_ticks()
+            current_time = self.get_ticks()
             self.score = (current_time - self.start_time) // 10
     
     def check_collisions(self):
@@ -237,70 +354,159 @@ class Game:
         if self.player.is_boosting:
             return
         
-        for obstacle in self.obstacles:
-            # Collision with blocks only, not holes
-            if obstacle.type == 'block' and self.player.rect.colliderect(obstacle.rect):
-                pygame.mixer.Sound('sounds/hit.wav').play() # Play hit sound
-                self.game_over = True
-                return # End collision check if game is over
-        
-        # Check collisions with flying enemies
-        for enemy in self.flying_enemies:
-            if self.player.rect.colliderect(enemy.rect):
-                pygame.mixer.Sound('sounds/hit.wav').play() # Play hit sound
-                self.game_over = True
-                return # End collision check if game is over
-    
-    def handle_events(self):
-        for event in pygame.event.get():
+        # Only blocks (not holes) and flying enemies are in the hazard grid;
+        # a rect hit only counts if the sprites' opaque pixels touch too
+        if self.hazards.spritecollide(self.player, collided=collide_mask):
+            self.sounds.play('hit') # Play hit sound
+            self.game_over = True
+            self.music.stop() # Stop background music
+            self.sounds.play('game_over') # Play game over sound, once
+    
+    def handle_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
             
+            # P or Escape pauses (and so does switching to another window)
+            if not self.game_over and (event.type == pygame.KEYDOWN and event.key in (pygame.K_p, pygame.K_ESCAPE)
+                                       or event.type == pygame.WINDOWFOCUSLOST and not self.paused):
+                self.paused = not self.paused
+                if self.paused:
+                    self.music.stop()
+                else:
+                    self.music.play()
+                continue
+            
             if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    profiler.toggle_overlay() # Frame profiler overlay
+                
+                if event.key == pygame.K_F4:
+                    self.show_masks = not self.show_masks # Hit mask debug view
+                
+                if self.paused:
+                    continue
+                
+                # Keys only take effect on the next step, so they can be recorded
                 if event.key == pygame.K_SPACE:
-                    if not self.game_over:
-                        self.player.jump()
-                    else:
-                        self.reset_game()
+                    self.inputs |= INPUT_JUMP
                 
                 if event.key == pygame.K_LSHIFT or event.key == pygame.K_RSHIFT:
-                    if not self.game_over:
-                        self.player.boost()
+                    self.inputs |= INPUT_BOOST
         
         return True
     
+    def step(self, inputs, dt=FRAME_MS):
+        """Advance one update; inputs is an INPUT_* bitmask, dt the game time it takes"""
+        self.game_time += dt
+        if not self.game_over:
+            self.frame += 1
+            if inputs & INPUT_JUMP:
+                self.player.jump()
+            if inputs & INPUT_BOOST:
+                self.player.boost()
+        self.update()
+    
+    def play_step(self, inputs):
+        """step(), recorded first when recording"""
+        if self.recorder:
+            self.recorder.record(inputs)
+        self.step(inputs)
+    
     def update(self):
         if not self.game_over:
             self.player.update()
-            self.spawn_obstacle()
-            self.spawn_flying_enemy() # New: Spawn flying enemies
+            self.spawn_due() # Obstacles and flying enemies
             
             # Update obstacles
-            for obstacle in self.obstacles[:]:
+            for obstacle in self.obstacles:
                 obstacle.update()
-                if obstacle.is_off_screen():
-                    self.obstacles.remove(obstacle)
+                if obstacle.type == 'block':
+                    self.hazards.move(obstacle)
             
             # Update flying enemies
-            for enemy in self.flying_enemies[:]: # New: Update flying enemies
+            for enemy in self.flying_enemies: # New: Update flying enemies
                 enemy.update()
-                if enemy.is_off_screen():
-                    self.flying_enemies.remove(enemy)
+                self.hazards.move(enemy)
+            
+            # Everything scrolls at one speed, so the oldest is always first off screen
+            for objects, pool in ((self.obstacles, self.obstacle_pool),
+                                  (self.flying_enemies, self.flying_enemy_pool)):
+                while objects and objects[0].is_off_screen():
+                    self.hazards.remove(objects[0])
+                    pool.release(objects.popleft())
             
+            profiler.mark("update")
             self.check_collisions()
+            profiler.mark("collide")
             self.update_score()
     
-    def draw_boost_indicator(self):
-        current_time = pygame.time.get_ticks()
-        cooldown_remaining = max(0, BOOST_COOLDOWN - (current_time - self.player.last_boost_time))
-        
+    def snapshot(self):
+        """The whole simulation state as numbers and arrays (see replay.py)"""
+        p = self.player
+        cursor, queued = self.level.state()
+        return {
+            "frame": self.frame, "score": self.score, "game_over": self.game_over, "time": self.game_time,
+            "player": (p.x, p.y, p.velocity_y, p.is_jumping, p.is_boosting,
+                       p.boost_start_time, p.last_boost_time),
+            "start_time": self.start_time,
+            "obstacles": np.array([(o.type == 'hole', o.x) for o in self.obstacles], int).reshape(-1, 2),
+            "flying": np.array([(e.x, e.y, e.initial_y, e.time) for e in self.flying_enemies],
+                               float).reshape(-1, 4),
+            "level_seed": self.level_seed,
+            "level": cursor,
+            "level_queue": np.array(queued, int).reshape(-1, 3),
+        }
+    
+    def restore(self, snap):
+        self.reset_game(snap["level_seed"])
+        self.frame, self.score, self.game_over = snap["frame"], snap["score"], snap["game_over"]
+        self.game_time = snap["time"]
+        p = self.player
+        (p.x, p.y, p.velocity_y, p.is_jumping, p.is_boosting,
+         p.boost_start_time, p.last_boost_time) = snap["player"].tolist()
+        p.is_jumping, p.is_boosting = bool(p.is_jumping), bool(p.is_boosting)
+        p.rect.topleft = (p.x, p.y)
+        self.start_time = snap["start_time"]
+        for hole, x in snap["obstacles"].tolist():
+            obstacle = self.obstacle_pool.acquire().spawn(type='hole' if hole else 'block')
+            obstacle.x = obstacle.rect.x = x
+            self.obstacles.append(obstacle)
+            if not hole:
+                self.hazards.insert(obstacle)
+        for x, y, initial_y, t in snap["flying"].tolist():
+            enemy = self.flying_enemy_pool.acquire().spawn(initial_y)
+            enemy.x, enemy.y, enemy.time = x, y, t
+            enemy.rect.topleft = (x, y)
+            self.flying_enemies.append(enemy)
+            self.hazards.insert(enemy)
+        self.level.set_state(snap["level"].tolist(), snap["level_queue"].tolist())
+    
+    def view(self):
+        """What draw_view() needs from this step, as an immutable View"""
+        p = self.player
+        return View(self.level_seed, self.score, self.game_over, (p.x, p.y), p.is_boosting,
+                    self.boost_cooldown(), p.boost_trail.view(),
+                    pipeline.frozen([(o.serial, o.x, o.type == 'hole') for o in self.obstacles], 3),
+                    pipeline.frozen([(e.serial, e.x, e.y) for e in self.flying_enemies], 3))
+    
+    def apply_quality(self):
+        quality.apply(self.governor.tier, self.renderer, self.background_image, self.plain_background,
+                      [self.player.boost_trail], self.music, self.dirty, self.sounds)
+        self.trail_detail = self.player.boost_trail.detail
+    
+    def boost_cooldown(self):
+        return max(0, BOOST_COOLDOWN - (self.get_ticks() - self.player.last_boost_time))
+    
+    def draw_boost_indicator(self, cooldown_remaining):
         # Draw boost bar background
         bar_width = 200
         bar_height = 20
         bar_x = SCREEN_WIDTH - bar_width - 20
         bar_y = 20
         
-        pygame.draw.rect(self.screen, GRAY, (bar_x, bar_y, bar_width, bar_height))
+        r = self.renderer
+        r.draw_rect(GRAY, (bar_x, bar_y, bar_width, bar_height))
         
         # Draw boost bar fill
         if cooldown_remaining == 0:
@@ -312,78 +518,274 @@ class Game:
             fill_width = int((1 - cooldown_remaining / BOOST_COOLDOWN) * bar_width)
             status_text = f"BOOST: {cooldown_remaining // 1000 + 1}s"
         
-        pygame.draw.rect(self.screen, fill_color, (bar_x, bar_y, fill_width, bar_height))
+        r.draw_rect(fill_color, (bar_x, bar_y, fill_width, bar_height))
         
         # Draw border
-        pygame.draw.rect(self.screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
+        r.draw_rect(WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
         
         # Draw text
-        boost_text = self.small_font.render(status_text, True, WHITE)
-        self.screen.blit(boost_text, (bar_x, bar_y + bar_height + 5))
+        boost_text = text.render(self.small_font, status_text, WHITE) # Only a few distinct strings
+        r.blit(boost_text, (bar_x, bar_y + bar_height + 5))
+    
+    def draw_masks(self):
+        hazards = [o for o in self.obstacles if o.type == 'block'] + list(self.flying_enemies)
+        self.renderer.blits([(mask_overlay(o.image), o.rect) for o in [self.player] + hazards])
+    
+    def draw_static(self):
+        # Ground and the controls line never change, so they live in the cached static layer
+        r = self.renderer
+        ground = pygame.Surface((SCREEN_WIDTH, GROUND_HEIGHT))
+        ground.fill(GRAY)
+        r.stamp(ground, pygame.Rect(0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT))
+        controls_text = self.small_font.render("SPACE: Jump | SHIFT: Boost", True, WHITE)
+        r.stamp(controls_text, controls_text.get_rect(topleft=(10, 50)))
     
     def draw(self):
-        # Clear screen
-        # self.screen.fill(BLACK) # Replaced by background image
-        self.screen.blit(self.background_image, (0,0)) # Draw background image
-        
-        # Draw ground
-        pygame.draw.rect(self.screen, GRAY, 
-                        (0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT))
+        r = self.renderer
+        if r.scene("runner"):
+            self.draw_static()
+        # Restore the background and ground (whole screen, or just last frame's rects)
+        r.begin()
         
         # Draw holes as black sections on the ground
         for obstacle in self.obstacles:
             if obstacle.type == 'hole':
-                pygame.draw.rect(self.screen, BLACK, obstacle.rect)
+                r.draw_rect(BLACK, obstacle.rect)
         
         # Draw player
-        self.player.draw(self.screen)
+        self.player.draw(r)
         
         # Draw obstacles
         for obstacle in self.obstacles:
             if obstacle.type == 'block': # Only draw blocks here, holes handled above
-                obstacle.draw(self.screen)
+                obstacle.draw(r)
         
         # Draw flying enemies
         for enemy in self.flying_enemies: # New: Draw flying enemies
-            enemy.draw(self.screen)
+            enemy.draw(r)
         
-        # Draw score
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+        if self.show_masks:
+            self.draw_masks()
         
-        # Draw controls
-        controls_text = self.small_font.render("SPACE: Jump | SHIFT: Boost", True, WHITE)
-        self.screen.blit(controls_text, (10, 50))
+        self.draw_hud(self.score, self.game_over, self.boost_cooldown())
+    
+    def draw_hud(self, score, game_over, cooldown_remaining):
+        r = self.renderer
+        # Draw score
+        text.number(r, self.font, WHITE, "Score: ", str(score), pos=(10, 10)) # Digits from a glyph atlas
         
         # Draw boost indicator
-        self.draw_boost_indicator()
+        self.draw_boost_indicator(cooldown_remaining)
         
         # Draw game over message
-        if self.game_over:
-            game_over_text = self.font.render("GAME OVER! Press SPACE to restart", True, WHITE)
+        if game_over:
+            game_over_text = text.render(self.font, "GAME OVER! Press SPACE to restart", WHITE)
             text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            self.screen.blit(game_over_text, text_rect)
-            pygame.mixer.music.stop() # Stop background music
-            pygame.mixer.Sound('sounds/game_over.wav').play() # Play game over sound
+            r.blit(game_over_text, text_rect)
             
-            final_score_text = self.font.render(f"Final Score: {self.score}", True, YELLOW)
-            score_rect = final_score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
-            self.screen.blit(final_score_text, score_rect)
+            text.number(r, self.font, YELLOW, "Final Score: ", str(score),
+                        center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
+        
+        # Draw pause message
+        if self.paused:
+            paused_text = text.render(self.font, "PAUSED - Press P to resume", WHITE)
+            r.blit(paused_text, paused_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
         
-        pygame.display.flip()
+        profiler.draw(r, SCREEN_WIDTH)
     
-    def run(self):
+    def draw_view(self, prev, cur, alpha):
+        """draw() from Views (pipelined mode): cur, with moving things 1 - alpha of a step back toward prev"""
+        r = self.renderer
+        if r.scene("runner"):
+            self.draw_static()
+        r.begin()
+        ground_y = SCREEN_HEIGHT - GROUND_HEIGHT
+        obstacles = pipeline.tween(prev.obstacles, cur.obstacles, alpha, cols=[1]).tolist()
+        enemies = pipeline.tween(prev.enemies, cur.enemies, alpha).tolist()
+        
+        # Holes first, as black sections on the ground
+        for _, x, hole in obstacles:
+            if hole:
+                r.draw_rect(BLACK, (int(x), ground_y, 70, OBSTACLE_HEIGHT))
+        
+        # Player, trail and boost outline
+        x, y = pipeline.lerp(prev.player, cur.player, alpha)
+        player = pygame.Rect(int(x), int(y), PLAYER_SIZE, PLAYER_SIZE)
+        self.player.boost_trail.draw_view(r, cur.trail, (1 - alpha)*FRAME_MS)
+        r.blit(self.player.image, player)
+        if cur.boosting:
+            r.draw_rect(YELLOW, player, 3)
+        
+        # Blocks and flying enemies
+        block = assets.image('bad.png', (OBSTACLE_WIDTH, OBSTACLE_HEIGHT))
+        enemy = assets.image('bad.png', (FLYING_ENEMY_SIZE, FLYING_ENEMY_SIZE))
+        hazards = [(block, (int(x), ground_y - OBSTACLE_HEIGHT)) for _, x, hole in obstacles if not hole]
+        hazards += [(enemy, (int(x), int(y))) for _, x, y in enemies]
+        r.blits(hazards)
+        if self.show_masks:
+            r.blits([(mask_overlay(image), pos) for image, pos in [(self.player.image, player)] + hazards])
+        
+        self.draw_hud(cur.score, cur.game_over, cur.cooldown)
+    
+    def gauge_frame(self, grid):
+        """Per-frame profiler gauges; grid is the hazards' frame_stats() for the frame"""
+        if not profiler.enabled:
+            return
+        profiler.gauge("sprites", 1 + len(self.obstacles) + len(self.flying_enemies))
+        for key in ("queries", "candidates", "hits"):
+            profiler.gauge(f"grid_{key}", grid[key]) # Broad phase work: how much the hash saves
+
+    def run(self, profile_out=None):
         running = True
+        steps = quality.FixedStep(FRAME_MS) # Same game speed whatever the frame rate
+        updates = 1
         while running:
-            running = self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            profiler.begin_frame()
+            # Game over and pause don't move: sleep until input instead of ticking at 60 FPS
+            idle = (self.game_over or self.paused) and not self.redraw and not profiler.overlay
+            events = quality.wait_events() if idle else pygame.event.get()
+            self.redraw = quality.needs_redraw(events)
+            state = self.game_over, self.paused
+            running = self.handle_events(events)
+            profiler.mark("idle" if idle else "events")
+            if self.game_over and self.inputs & INPUT_JUMP:
+                self.new_game()
+                self.music.play() # Restart the background music
+                self.inputs = 0
+            for _ in range(0 if self.paused else updates):
+                self.play_step(self.inputs)
+                self.inputs = 0
+            if self.recorder and self.game_over:
+                self.recorder.save(self.record_path)
+                self.recorder = None
+            self.music.intensity = min(1.0, self.score / 6000) # Music speeds up the longer you last
+            self.music.pump()
+            profiler.mark("audio")
+            self.redraw |= (self.game_over, self.paused) != state
+            if not idle or self.redraw:
+                self.draw()
+                profiler.mark("draw")
+                self.renderer.present() # Display update (flip) timed on its own, as in main.py
+                profiler.mark("present")
+            self.gauge_frame(self.hazards.frame_stats())
+            if idle:
+                self.clock.tick() # The sleep is neither frame time nor time owed
+                steps.reset()
+                updates = 0
+            else:
+                updates = steps.advance(self.clock.tick(FPS))
+                if self.governor:
+                    if self.governor.update(self.clock.get_rawtime()):
+                        self.apply_quality()
+                    profiler.gauge("tier", self.governor.tier)
+            profiler.mark("tick")
+            profiler.end_frame()
         
+        self.quit(profile_out)
+    
+    def run_pipelined(self, profile_out=None, render_fps=pipeline.RENDER_FPS):
+        """run() with the updates on their own fixed-rate thread, drawing its Views (see pipeline.py)"""
+        sim = pipeline.Simulation(self.play_step, self.view, FRAME_MS,
+                                  active=lambda: not (self.game_over or self.paused))
+        sim.start()
+        shown = None # (game over, paused) when last drawn
+        last_published = sim.frames.published
+        running = True
+        while running:
+            profiler.begin_frame()
+            # The game can end on the other thread, so draw any state not yet shown before idling
+            idle = ((self.game_over or self.paused) and not self.redraw and not profiler.overlay
+                    and (self.game_over, self.paused) == shown)
+            events = quality.wait_events() if idle else pygame.event.get()
+            self.redraw = quality.needs_redraw(events)
+            # The simulation thread waits while the game is changed under it
+            with sim.lock:
+                running = self.handle_events(events)
+                if self.game_over and self.inputs & INPUT_JUMP:
+                    self.new_game()
+                    self.music.play() # Restart the background music
+                    sim.publish()
+                    self.inputs = 0 # The restart key isn't a jump, as in run()
+                if not self.game_over: # Keys pressed on the game over screen go nowhere, as in run()
+                    sim.input(pressed=self.inputs)
+                self.inputs = 0
+                if self.recorder and self.game_over:
+                    self.recorder.save(self.record_path)
+                    self.recorder = None
+                state = self.game_over, self.paused
+                grid = self.hazards.frame_stats() # Counted by the simulation thread's steps
+            sim.wake()
+            profiler.mark("idle" if idle else "events")
+            self.music.intensity = min(1.0, self.score / 6000) # Music speeds up the longer you last
+            self.music.pump()
+            profiler.mark("audio")
+            self.redraw |= state != shown
+            if not idle or self.redraw:
+                self.draw_view(*sim.frames.latest())
+                profiler.mark("draw")
+                self.renderer.present()
+                shown = state
+                profiler.mark("present")
+            self.gauge_frame(grid)
+            published = sim.frames.published
+            profiler.gauge("steps", published - last_published) # Steps since the last frame, not since the start
+            last_published = published
+            if idle:
+                self.clock.tick()
+            else:
+                self.clock.tick(render_fps)
+                if self.governor:
+                    if self.governor.update(self.clock.get_rawtime()):
+                        self.apply_quality()
+                    profiler.gauge("tier", self.governor.tier)
+            profiler.mark("tick")
+            profiler.end_frame()
+        
+        sim.stop()
+        self.quit(profile_out)
+    
+    def quit(self, profile_out=None):
+        if self.recorder:
+            self.recorder.save(self.record_path)
+        if profile_out:
+            profiler.export(profile_out)
+        if self.renderer.capture:
+            self.renderer.capture.close()
         pygame.quit()
         sys.exit()
 
 # Run the game
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Endless Runner")
+    parser.add_argument("--dirty", action="store_true",
+                        help="redraw only changed screen areas instead of the whole frame")
+    parser.add_argument("--backend", choices=BACKENDS, default="surface",
+                        help="draw with software surfaces (default) or SDL2 textures")
+    parser.add_argument("--seed", type=int, help="seed for the level layouts")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="classic",
+                        help="how spawns speed up over a game (default: classic, they don't)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save a replay of each game to PATH (the last game wins)")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="record gameplay: a directory of PNGs, or a .y4m / .rgb file")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="update on a thread of its own and draw its snapshots, interpolated")
+    parser.add_argument("--render-fps", type=int, metavar="FPS", default=pipeline.RENDER_FPS,
+                        help=f"with --pipelined, cap drawing at FPS (default {pipeline.RENDER_FPS}, 0: none)")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="never shed effects to hold the frame rate")
+    parser.add_argument("--show-masks", action="store_true",
+                        help="draw the pixel masks used for hit tests (F4 toggles)")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-phase frame timings (F3 toggles the overlay)")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="on exit, write the recorded frames to PATH (.json or .csv)")
+    args = parser.parse_args()
+    profiler.enabled = args.profile or bool(args.profile_out)
+    game = Game(dirty=args.dirty, backend=args.backend, governor=not args.fixed_quality,
+                seed=args.seed, record=args.record, difficulty=args.difficulty,
+                show_masks=args.show_masks, capture=args.capture)
+    if args.pipelined:
+        game.run_pipelined(profile_out=args.profile_out, render_fps=args.render_fps)
+    else:
+        game.run(profile_out=args.profile_out)
\ No newline at end of file
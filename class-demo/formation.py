@@ -0,0 +1,144 @@
+import numpy as np
+import pygame
+
+import collision
+
+
+class Formation:
+    """The invader block stored as flat NumPy arrays instead of one sprite each.
+
+    Invader i sits in row i // cols, column i % cols.  The block only ever moves
+    as a unit, so every position is its home slot plus one shared (dx, dy)
+    offset: marching is O(1), and the edge/bottom checks only look at the
+    outermost columns and lowest row that still have someone alive.  Each
+    column also remembers its lowest alive invader, which is who fires.
+    """
+    def __init__(self, images, rows=5, cols=12, x=100, y=80, x_off=70, y_off=60, size=(60, 50)):
+        self.images = images                  # one surface per point tier
+        self.rows, self.cols = rows, cols
+        self.x0, self.y0 = x, y
+        self.x_off, self.y_off = x_off, y_off
+        self.w, self.h = size
+        self.dx = self.dy = 0
+
+        n = rows*cols
+        self.row, self.col = np.divmod(np.arange(n), cols)
+        self.home_x = x + self.col*x_off
+        self.home_y = y + self.row*y_off
+        self.tier   = np.minimum(self.row//2, 2)          # 0,1,2
+        self.points = (3 - self.tier)*10
+        self.alive  = np.ones(n, dtype=bool)
+        self.size   = n
+        self.count  = n
+
+        self.col_count = np.full(cols, rows)
+        self.row_count = np.full(rows, cols)
+        self.lowest    = (rows-1)*cols + np.arange(cols)   # -1 once a column is empty
+        self.first_col, self.last_col, self.last_row = 0, cols-1, rows-1
+
+    def __len__(self):
+        return self.count
+
+    # ─── geometry ───
+    def left(self):   return self.x0 + self.dx + self.first_col*self.x_off
+    def right(self):  return self.x0 + self.dx + self.last_col*self.x_off + self.w
+    def bottom(self): return self.y0 + self.dy + self.last_row*self.y_off + self.h
+
+    def positions(self):
+        """(x, y) arrays of the top-left corner of every alive invader"""
+        idx = np.flatnonzero(self.alive)
+        return self.home_x[idx] + self.dx, self.home_y[idx] + self.dy
+
+    def rect(self, i):
+        return pygame.Rect(int(self.home_x[i]) + self.dx, int(self.home_y[i]) + self.dy, self.w, self.h)
+
+    # ─── movement ───
+    def march(self, direction, step, descend, lo, hi):
+        """Step sideways, or drop a row and reverse at the lo/hi x bounds.
+
+        Returns the new direction.
+        """
+        if not self.count: return direction
+        if (direction==1 and self.right()>=hi) or (direction==-1 and self.left()<=lo):
+            self.dy += descend
+            return -direction
+        self.dx += step*direction
+        return direction
+
+    # ─── hits ───
+    def collide(self, rect, mask=None):
+        """Indices of alive invaders overlapping rect, in row-major order.
+
+        With mask (the pixel mask of whatever fills rect) an invader only
+        counts once their image's opaque pixels overlap it too.
+        """
+        if not self.count: return []
+        ox, oy = self.x0 + self.dx, self.y0 + self.dy
+        # only the slots the rect can reach, same strict overlap as colliderect
+        c_lo = max(0, (rect.left - ox - self.w)//self.x_off + 1)
+        c_hi = min(self.cols-1, -((ox - rect.right)//self.x_off) - 1)
+        r_lo = max(0, (rect.top - oy - self.h)//self.y_off + 1)
+        r_hi = min(self.rows-1, -((oy - rect.bottom)//self.y_off) - 1)
+        hits = []
+        for r in range(r_lo, r_hi+1):
+            for c in range(c_lo, c_hi+1):
+                i = r*self.cols + c
+                if self.alive[i] and (mask is None or self.overlaps(i, rect, mask)): hits.append(i)
+        return hits
+
+    def overlaps(self, i, rect, mask):
+        x, y = int(self.home_x[i]) + self.dx, int(self.home_y[i]) + self.dy
+        return collision.mask(self.images[self.tier[i]]).overlap(mask, (rect.x - x, rect.y - y)) is not None
+
+    def kill(self, i):
+        if not self.alive[i]: return
+        self.alive[i] = False
+        self.count -= 1
+        r, c = self.row[i], self.col[i]
+        self.col_count[c] -= 1
+        self.row_count[r] -= 1
+        if self.lowest[c]==i:
+            above = np.flatnonzero(self.alive[c::self.cols])
+            self.lowest[c] = above[-1]*self.cols + c if len(above) else -1
+        if not self.count: return
+        if self.col_count[c]==0 and c in (self.first_col, self.last_col):
+            cols = np.flatnonzero(self.col_count)
+            self.first_col, self.last_col = int(cols[0]), int(cols[-1])
+        if self.row_count[r]==0 and r==self.last_row:
+            self.last_row = int(np.flatnonzero(self.row_count)[-1])
+
+    def restore(self, alive, dx, dy):
+        """Reset to a saved alive mask and offset, rebuilding the bookkeeping"""
+        self.alive[:] = alive
+        self.dx, self.dy = int(dx), int(dy)
+        grid = self.alive.reshape(self.rows, self.cols)
+        self.count = int(grid.sum())
+        self.col_count = grid.sum(axis=0)
+        self.row_count = grid.sum(axis=1)
+        lowest = self.rows - 1 - np.argmax(grid[::-1], axis=0)          # last alive row per column
+        self.lowest = np.where(self.col_count>0, lowest*self.cols + np.arange(self.cols), -1)
+        if self.count:
+            cols, rows = np.flatnonzero(self.col_count), np.flatnonzero(self.row_count)
+            self.first_col, self.last_col, self.last_row = int(cols[0]), int(cols[-1]), int(rows[-1])
+
+    def shooter(self, rng):
+        """Pick a random non-empty column; its lowest invader fires"""
+        cols = np.flatnonzero(self.col_count)
+        i = self.lowest[cols[rng.randrange(len(cols))]]
+        return int(self.home_x[i]) + self.dx + self.w//2, int(self.home_y[i]) + self.dy + self.h
+
+    # ─── draw ───
+    def draw(self, screen):
+        """Blit every alive invader; screen can be a Surface or a Renderer"""
+        idx = np.flatnonzero(self.alive)
+        xs = (self.home_x[idx] + self.dx).tolist()
+        ys = (self.home_y[idx] + self.dy).tolist()
+        images = self.images
+        return screen.blits([(images[t], (x, y)) for t, x, y in zip(self.tier[idx].tolist(), xs, ys)])
+
+    def draw_masks(self, screen):
+        """Blit every alive invader's hit mask (debug view)"""
+        idx = np.flatnonzero(self.alive)
+        overlays = [collision.mask_overlay(image) for image in self.images]
+        return screen.blits([(overlays[t], (int(self.home_x[i]) + self.dx, int(self.home_y[i]) + self.dy))
+                             for t, i in zip(self.tier[idx].tolist(), idx.tolist())])
@@ -0,0 +1,82 @@
+"""Runner levels: where obstacles and flying enemies appear, laid out ahead of time.
+
+A level is a queue of spawns in scroll order, each (time ms, kind, y).  It
+is generated a chunk at a time from the level seed and a difficulty curve,
+and chunks are laid out before the game reaches them, so the game only pops
+whatever is due off the front of the queue.
+
+Settings (spawn_time, enemy_spawn_time, hole_chance) each take a value or a
+difficulty curve: a function of elapsed game ms returning one (see ramp()).
+"""
+import random
+from collections import deque
+
+BLOCK, HOLE, ENEMY = 0, 1, 2
+
+
+def setting(value, elapsed):
+    return value(elapsed) if callable(value) else value
+
+
+def ramp(start, end, over_ms):
+    """A difficulty curve going in a straight line from start to end over over_ms"""
+    return lambda elapsed: start + (end - start)*min(elapsed/over_ms, 1.0)
+
+
+class Level:
+    """Scroll-ordered spawn queue for one runner game, generated chunk by chunk.
+
+    Each chunk covers chunk_ms of game time and draws from its own RNG,
+    seeded by the level seed and the chunk number, so a game's layout
+    depends only on its seed.  Spawns land on step boundaries exactly where
+    polling every step_ms would put them: the first step more than the
+    interval after the previous spawn.  due(now) yields the spawns whose
+    time has come, generating more chunks first once less than lookahead
+    ms are queued.
+    """
+    def __init__(self, seed, step_ms, spawn_time, enemy_spawn_time, hole_chance, enemy_y,
+                 chunk_ms=4000, lookahead=4000):
+        self.seed, self.step_ms = seed, step_ms
+        self.spawn_time, self.enemy_spawn_time = spawn_time, enemy_spawn_time
+        self.hole_chance, self.enemy_y = hole_chance, enemy_y
+        self.chunk_ms, self.lookahead = chunk_ms, lookahead
+        self.queue = deque()
+        self.chunk = 0                                   # next chunk to generate
+        self.next_obstacle = self.gap(spawn_time, 0)
+        self.next_enemy = self.gap(enemy_spawn_time, 0)
+
+    def gap(self, interval, elapsed):
+        """Time from one spawn to the next: the first step past the interval"""
+        return (int(setting(interval, elapsed)//self.step_ms) + 1)*self.step_ms
+
+    def generate(self):
+        """Lay out the next chunk and queue its spawns"""
+        rng = random.Random(f"{self.seed}:{self.chunk}")
+        end = (self.chunk + 1)*self.chunk_ms
+        spawns = []
+        while self.next_obstacle < end:
+            t = self.next_obstacle
+            spawns.append((t, HOLE if rng.random() < setting(self.hole_chance, t) else BLOCK, 0))
+            self.next_obstacle = t + self.gap(self.spawn_time, t)
+        while self.next_enemy < end:
+            t = self.next_enemy
+            spawns.append((t, ENEMY, rng.randint(*self.enemy_y)))
+            self.next_enemy = t + self.gap(self.enemy_spawn_time, t)
+        spawns.sort()                                    # obstacles before enemies on a tie
+        self.queue.extend(spawns)
+        self.chunk += 1
+
+    def due(self, now):
+        while self.chunk*self.chunk_ms < now + self.lookahead:
+            self.generate()
+        queue = self.queue
+        while queue and queue[0][0] <= now:
+            yield queue.popleft()
+
+    def state(self):
+        """(chunk, next obstacle, next enemy) and the queued spawns, for snapshots"""
+        return (self.chunk, self.next_obstacle, self.next_enemy), list(self.queue)
+
+    def set_state(self, cursor, queued):
+        self.chunk, self.next_obstacle, self.next_enemy = (int(v) for v in cursor)
+        self.queue = deque(tuple(int(v) for v in spawn) for spawn in queued)
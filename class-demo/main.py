@@ -1,49 +1,118 @@
+import argparse
+from collections import namedtuple
+from contextlib import nullcontext
+import itertools
 import os
 import random
 import sys
+import threading
+import time
 
+import numpy as np
 import pygame
 
-pygame.init()
-pygame.mixer.init()
+from assets import assets, converted, system_font
+from capture import Capture
+from collision import SpatialHash, collide_mask, mask, mask_overlay
+from formation import Formation
+from music import MusicStream
+from particles import Particles
+import pipeline
+from pools import Pool
+from profiler import Stopwatch, profiler
+import quality
+import replay
+from render import BACKENDS, make_renderer, open_display
+from textcache import text
+from shields import Bunker, bunker_grid
+from soundbank import SoundBank
+from synth import MIXER
 
 # Improved dimensions for better gameplay
 WIDTH, HEIGHT = 1024, 768
 FPS = 60
+STEP_MS = 1000//FPS   # one simulation step; Clock.tick(60) paces frames at 16 ms too
 WHITE, BLACK, RED, GREEN, BLUE = (255,)*3, (0,)*3, (220,40,40), (0,210,0), (40,120,255)
 BG = (10, 10, 20)
 PLAYER_SPEED, BULLET_SPEED, ENEMY_BULLET_SPEED = 8, 12, 5
 ENEMY_MOVE_TIME = 600     # ms between horizontal steps (will speed up)
 ENEMY_DESCEND = 28
-FONT = pygame.font.SysFont("consolas", 28)
-
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
-def load_sound(name):
-    path = os.path.join("sounds", name)
-    if os.path.exists(path):
-        return pygame.mixer.Sound(path)
-    return None
-
-def load_music(name):
-    path = os.path.join("sounds", name)
-    if os.path.exists(path):
-        return path
-    return None
-
-# Load sound effects
-snd_player_shoot = load_sound("shoot.wav")
-snd_enemy_shoot  = load_sound("invader_shoot.wav")
-snd_hit          = load_sound("hit.wav")
-snd_explosion    = load_sound("explosion.wav")
-snd_game_over    = load_sound("game_over.wav")
-
-# Load background music
-bg_music = load_music("background_music.wav")
-if bg_music:
-    pygame.mixer.music.load(bg_music)
-    pygame.mixer.music.set_volume(0.3)
+SHIELD_CELL, SHIELD_BLAST = 2, 7     # px per shield grid cell, px radius a hit clears
+
+# Every image variant the game uses, loaded once before play starts
+IMAGES = [("player.png", (80, 60), True), ("bad.png", (60, 50), True),
+          ("background.png", (WIDTH, HEIGHT), False)]
+
+# Every sound effect: file, channel group, max voices at once, min ms between starts
+SOUNDS = {
+    "player_shoot": ("shoot.wav", "player", 2, 60),
+    "enemy_shoot":  ("invader_shoot.wav", "enemy", 2, 80),
+    "hit":          ("hit.wav", "impact", 2, 40),
+    "explosion":    ("explosion.wav", "impact", 1, 150),
+    "game_over":    ("game_over.wav", "ui", 1, 1000),
+}
+CHANNELS = {"player": 2, "enemy": 2, "impact": 2, "ui": 1}   # channel 0 is the music's
+
+pygame.mixer.pre_init(*MIXER)   # the format build_assets.py writes the WAVs in
+
+# Input bitmask for Invaders.step(); FIRE means "space pressed this frame"
+INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE = 1, 2, 4
+
+# What drawing needs from one step, for --pipelined (see pipeline.py): invader rows are
+# (x, y, tier), bullet rows (id, x, y, falling), shields one (image copy, rect) per bunker
+View = namedtuple("View", "game state score lives player invaders bullets particles shields")
+serials = itertools.count()     # bullet ids, so views can pair a bullet up across steps
+
+def init_pygame(headless=False, backend="surface"):
+    """Start pygame and open the display; headless uses SDL's dummy drivers"""
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    pygame.mixer.init()
+    # convert()/convert_alpha() need a display surface even when headless
+    display = open_display((WIDTH, HEIGHT), backend, "Space Invaders")
+    assets.preload(IMAGES)
+    return display
+
+class Loader(threading.Thread):
+    """Loads audio and sprites in the background while the title screen is up.
+
+    wait() blocks until everything is ready (re-raising any load error);
+    reset() is the first thing that needs it.
+    """
+    def __init__(self, seed=None, timer=None):
+        super().__init__(daemon=True)
+        self.seed, self.timer = seed, timer or Stopwatch()
+        self.error = None
+
+    def run(self):
+        try:
+            t = time.perf_counter()
+            pygame.mixer.init()
+            self.timer.lap("mixer init (bg)", t); t = time.perf_counter()
+            self.sounds = SoundBank(SOUNDS, CHANNELS)   # every effect decoded up front
+            self.timer.lap("sounds (bg)", t); t = time.perf_counter()
+            assets.preload(IMAGES)
+            self.timer.lap("images (bg)", t); t = time.perf_counter()
+            # Procedural background music, streamed on its own channel
+            self.music = MusicStream(seed=self.seed)
+            self.timer.lap("music (bg)", t)
+        except Exception as exc:
+            self.error = exc
+
+    def wait(self):
+        self.join()
+        if self.error: raise self.error
+        return self
+
+def load_background():
+    try:
+        return assets.image("background.png", (WIDTH, HEIGHT), alpha=False)
+    except:
+        bg_image = converted(pygame.Surface((WIDTH, HEIGHT)), alpha=False)
+        bg_image.fill(BG)
+        return bg_image
 
 # ───────── Sprites ─────────
 class Player(pygame.sprite.Sprite):
@@ -51,9 +120,8 @@ class Player(pygame.sprite.Sprite):
         super().__init__()
         # Load the player image
         try:
-            self.image = pygame.image.load("player.png").convert_alpha()
-            # Scale the image to a reasonable size for gameplay
-            self.image = pygame.transform.scale(self.image, (80, 60))
+            # Scaled to a reasonable size for gameplay, shared via the asset cache
+            self.image = assets.image("player.png", (80, 60))
         except:
             # Fallback to green rectangle if image loading fails
             self.image = pygame.Surface((80, 60))
@@ -61,219 +129,526 @@ class Player(pygame.sprite.Sprite):
         self.rect  = self.image.get_rect(midbottom=(WIDTH//2, HEIGHT-40))
         self.lives = 3
 
-    def update(self, keys):
-        if keys[pygame.K_LEFT] and self.rect.left>0:         self.rect.x -= PLAYER_SPEED
-        if keys[pygame.K_RIGHT] and self.rect.right<WIDTH:   self.rect.x += PLAYER_SPEED
+    def update(self, inputs):
+        if inputs & INPUT_LEFT and self.rect.left>0:         self.rect.x -= PLAYER_SPEED
+        if inputs & INPUT_RIGHT and self.rect.right<WIDTH:   self.rect.x += PLAYER_SPEED
 
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x,y, speed, color=WHITE):
-        super().__init__()
-        self.image = pygame.Surface((6,18)); self.image.fill(color)
-        self.rect  = self.image.get_rect(midbottom=(x,y))
-        self.speed = speed
-    def update(self): 
-        self.rect.y += self.speed
-        if self.rect.bottom<0 or self.rect.top>HEIGHT: self.kill()
+def solid(size, color, _cache={}):
+    """Shared single-color surface, made once per (size, color)"""
+    surf = _cache.get((size, color))
+    if surf is None:
+        surf = _cache[size, color] = pygame.Surface(size); surf.fill(color)
+    return surf
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x,y,row):
-        super().__init__()
-        # Load the enemy image
-        try:
-            self.image = pygame.image.load("bad.png").convert_alpha()
-            # Scale the image to a reasonable size for gameplay
-            self.image = pygame.transform.scale(self.image, (60, 50))
-        except:
-            # Fallback to colored rectangles if image loading fails
-            w,h = 60,50
-            self.image = pygame.Surface((w,h))
-            colors = [BLUE,WHITE,RED]             # 3 point tiers
-            self.tier  = row//2                   # 0,1,2
-            self.points= (3-self.tier)*10
-            self.image.fill(colors[self.tier])
-        
-        self.tier  = row//2                   # 0,1,2
-        self.points= (3-self.tier)*10
-        self.rect = self.image.get_rect(topleft=(x,y))
-
-class Shield(pygame.sprite.Sprite):
-    def __init__(self,x,y):
+class PooledSprite(pygame.sprite.Sprite):
+    """Sprite that goes back to its Pool when killed"""
+    def __init__(self, pool=None):
         super().__init__()
-        self.image = pygame.Surface((10,10)); self.image.fill((50,200,50))
-        self.rect  = self.image.get_rect(topleft=(x,y))
+        self.pool = pool
+    def kill(self):
+        super().kill()
+        if self.pool: self.pool.release(self)
 
-class Explosion(pygame.sprite.Sprite):
-    def __init__(self,pos,color,size=8):
-        super().__init__()
-        self.image = pygame.Surface((size,size)); self.image.fill(color)
-        self.rect = self.image.get_rect(center=pos)
-        self.timer= 180   # ms
+class Bullet(PooledSprite):
+    def __init__(self, pool=None, color=WHITE):
+        super().__init__(pool)
+        self.image = solid((6,18), color)
+        self.rect  = self.image.get_rect()
+        self.speed = 0
+    def spawn(self, x,y, speed):
+        self.rect.midbottom = (x,y)
+        self.speed = speed
+        self.serial = next(serials)
+        return self
     def update(self):
-        self.timer -= clock.get_time()
-        if self.timer<=0: self.kill()
+        self.rect.y += self.speed
+        if self.rect.bottom<0 or self.rect.top>HEIGHT: self.kill()
 
 # ───────── build stage ─────────
-def build_enemies():
-    g = pygame.sprite.Group()
-    rows, cols = 5, 12
-    x_off, y_off = 70, 60
-    for r in range(rows):
-        for c in range(cols):
-            x = 100 + c*x_off
-            y = 80 + r*y_off
-            g.add(Enemy(x,y,r))
-    return g
+def build_enemies(rows=5, cols=12):
+    # Big custom waves squeeze the spacing (and invaders) so the block still fits
+    x_off, y_off = min(70, (WIDTH-160)//cols), min(60, 300//rows)
+    size = min(60, x_off-10), min(50, y_off-10)
+    # Load the enemy image once; every invader in the formation shares it
+    try:
+        # Scaled to a reasonable size for gameplay, shared via the asset cache
+        images = [assets.image("bad.png", size)]*3
+    except:
+        # Fallback to colored rectangles if image loading fails
+        images = []
+        for color in (BLUE,WHITE,RED):       # 3 point tiers
+            image = pygame.Surface(size); image.fill(color)
+            images.append(image)
+    return Formation(images, rows, cols, x=100, y=80, x_off=x_off, y_off=y_off, size=size)
 
 def build_shields():
-    g = pygame.sprite.Group()
     start_x = 150
-    for bunker in range(4):
-        for row in range(8):
-            for col in range(12):
-                if row<3 and 3<col<8: continue               # carve top arch
-                x = start_x + bunker* (WIDTH//4) + col*10
-                y = HEIGHT-200 + row*10
-                g.add(Shield(x,y))
-    return g
-
-# ───────── helpers ─────────
-def draw_hud(score, lives):
-    txt = FONT.render(f"Score {score:04d}", True, WHITE); screen.blit(txt,(30,15))
-    for i in range(lives):
-        pygame.draw.rect(screen, GREEN, pygame.Rect(WIDTH-150+i*35,15,25,15))
-
-def maybe_fire_enemy_bullet():
-    global enemy_bullets
-    if len(enemies)==0 or len(enemy_bullets): return
-    if random.random()<0.02:                    # 2 % chance per frame
-        shooter = random.choice(enemies.sprites())
-        bullet = Bullet(shooter.rect.centerx, shooter.rect.bottom, ENEMY_BULLET_SPEED, RED)
-        enemy_bullets.add(bullet)
-        if snd_enemy_shoot: snd_enemy_shoot.play()
-
-# ───────── game objects ─────────
-state = "TITLE"
-player  = Player()
-player_grp = pygame.sprite.GroupSingle(player)
-bullets, enemy_bullets = pygame.sprite.Group(), pygame.sprite.Group()
-enemies  = build_enemies()
-shields  = build_shields()
-explodes = pygame.sprite.Group()
-
-enemy_dir, enemy_timer, level_speedup = 1, 0, 0
-score = 0
-
-# Load background image
-try:
-    bg_image = pygame.image.load("background.png").convert()
-    bg_image = pygame.transform.scale(bg_image, (WIDTH, HEIGHT))
-except:
-    bg_image = None
-
-def reset():
-    global player, player_grp, bullets, enemy_bullets, enemies, shields, explodes
-    global enemy_dir, enemy_timer, level_speedup, score, state
-    player  = Player(); player_grp = pygame.sprite.GroupSingle(player)
-    bullets, enemy_bullets = pygame.sprite.Group(), pygame.sprite.Group()
-    enemies, shields = build_enemies(), build_shields()
-    explodes.empty()
-    enemy_dir, enemy_timer, level_speedup = 1, 0, 0
-    score   = 0
-    state   = "PLAYING"
-    # Start background music
-    if bg_music:
-        pygame.mixer.music.play(-1)  # Loop indefinitely
+    return [Bunker(start_x + bunker*(WIDTH//4), HEIGHT-200, bunker_grid(SHIELD_CELL), SHIELD_CELL)
+            for bunker in range(4)]
 
-# ───────── main loop ─────────
-while True:
-    dt = clock.tick(FPS)
-    keys = pygame.key.get_pressed()
-    for e in pygame.event.get():
-        if e.type==pygame.QUIT: pygame.quit(); sys.exit()
-        if state=="PLAYING" and e.type==pygame.KEYDOWN and e.key==pygame.K_SPACE and len(bullets)<3:
-            bullets.add(Bullet(player.rect.centerx, player.rect.top, -BULLET_SPEED))
-            if snd_player_shoot: snd_player_shoot.play()
-        if state in ("TITLE","GAME_OVER") and e.type==pygame.KEYDOWN:
-            reset()
-
-    # ─── Update world ───
-    if state=="PLAYING":
-        player_grp.update(keys)
-        bullets.update(); enemy_bullets.update(); explodes.update()
+# ───────── simulation ─────────
+STATES = "TITLE", "PLAYING", "GAME_OVER"
+
+class Invaders:
+    """All world state for one game; advance it with step(inputs, dt).
+
+    Nothing here touches the display or the clock, so a seeded game can be
+    stepped as fast as the CPU allows and always plays out the same way.
+    """
+    def __init__(self, seed=None, sounds=None, music=None, rows=5, cols=12,
+                 max_bullets=3, max_enemy_bullets=1, enemy_fire=0.02):
+        self.rng    = random.Random(seed)
+        self.sounds = sounds        # a SoundBank, or None to stay silent
+        self.music  = music
+        self.wave   = rows, cols
+        self.options = dict(rows=rows, cols=cols, max_bullets=max_bullets,      # enough to rebuild it
+                            max_enemy_bullets=max_enemy_bullets, enemy_fire=enemy_fire)
+        self.max_bullets, self.max_enemy_bullets = max_bullets, max_enemy_bullets
+        self.enemy_fire = enemy_fire                # chance per frame
+        self.state  = "TITLE"
+        # Sprites that come and go every few frames are recycled, not reallocated
+        self.pools  = {
+            "bullet":       Pool(Bullet, max_bullets),
+            "enemy_bullet": Pool(lambda pool: Bullet(pool, RED), max_enemy_bullets+1),
+        }
+        # Explosions: a flash plus debris, all in one NumPy particle buffer
+        self.particles = Particles(capacity=2048, gravity=0.0004, seed=seed)
+        self.shields = []           # the world itself is built on the first reset()
+        self.show_masks = False     # debug view: draw the pixel masks hits are tested with
+        self.score  = 0
+        self.games  = 0             # resets so far; views of different games never interpolate
+        self.stamped = {}           # --pipelined: bunker -> shield image last stamped
+
+    def build(self):
+        if hasattr(self, "bullets"):           # hand last game's sprites back to their pools
+            for grp in (self.bullets, self.enemy_bullets):
+                for sprite in grp.sprites(): sprite.kill()
+        self.player     = Player()
+        self.player_grp = pygame.sprite.GroupSingle(self.player)
+        self.bullets, self.enemy_bullets = pygame.sprite.Group(), pygame.sprite.Group()
+        self.enemies    = build_enemies(*self.wave)
+        self.shields    = build_shields()
+        self.grid       = SpatialHash(64)      # broad phase for bullets vs bunkers
+        for bunker in self.shields: self.grid.insert(bunker)
+        self.shield_views = [None]*len(self.shields)
+        self.particles.clear()
+        self.enemy_dir, self.enemy_timer, self.level_speedup = 1, 0, 0
+        self.score      = 0
+        self.frame      = 0
+
+    def reset(self, seed=None):
+        if seed is not None: self.rng.seed(seed)
+        self.build()
+        self.games += 1
+        self.state = "PLAYING"
+        # Start background music
+        if self.music: self.music.play()
+
+    def play(self, name):
+        if self.sounds: self.sounds.play(name)
+
+    def game_over(self, sound=True):
+        self.state = "GAME_OVER"
+        if self.music: self.music.stop()
+        if sound: self.play("game_over")
+
+    def explode(self, pos, color, size=8):
+        fx = self.particles
+        x, y = pos
+        fx.emit_one(x, y, fx.sprite(solid((size,size), color)), life=180)
+        fx.emit(x, y, size*8, fx.sprite(solid((3,3), color)), speed=(0.03, 0.02*size), life=(200, 600))
+
+    def pool_stats(self):
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def maybe_fire_enemy_bullet(self):
+        if len(self.enemies)==0 or len(self.enemy_bullets)>=self.max_enemy_bullets: return
+        if self.rng.random()<self.enemy_fire:       # 2 % chance per frame by default
+            x, y = self.enemies.shooter(self.rng)      # lowest invader of a random column
+            bullet = self.pools["enemy_bullet"].acquire().spawn(x, y, ENEMY_BULLET_SPEED)
+            self.enemy_bullets.add(bullet)
+            self.play("enemy_shoot")
+
+    def step(self, inputs, dt):
+        """Advance one frame; inputs is an INPUT_* bitmask, dt is in ms"""
+        if self.state!="PLAYING": return self.state
+        self.frame += 1
+        player = self.player
+
+        if inputs & INPUT_FIRE and len(self.bullets)<self.max_bullets:
+            bullet = self.pools["bullet"].acquire().spawn(player.rect.centerx, player.rect.top, -BULLET_SPEED)
+            self.bullets.add(bullet)
+            self.play("player_shoot")
+
+        self.player_grp.update(inputs)
+        self.bullets.update(); self.enemy_bullets.update(); self.particles.update(dt)
 
         # Enemy block movement
-        enemy_timer += dt
-        step_time = max(80, ENEMY_MOVE_TIME - level_speedup*12)   # speeds up
-        if enemy_timer >= step_time:
-            enemy_timer = 0
-            hit_edge = any((enemy.rect.right>=WIDTH-10 and enemy_dir==1) or
-                           (enemy.rect.left<=10 and enemy_dir==-1) for enemy in enemies)
-            if hit_edge:
-                enemy_dir *= -1
-                for en in enemies: en.rect.y += ENEMY_DESCEND
-            else:
-                for en in enemies: en.rect.x += 10*enemy_dir
-            level_speedup = (60 - len(enemies))                   # fewer invaders → faster
-
-        maybe_fire_enemy_bullet()
-
-        # Collisions
+        self.enemy_timer += dt
+        step_time = max(80, ENEMY_MOVE_TIME - self.level_speedup*12)   # speeds up
+        if self.enemy_timer >= step_time:
+            self.enemy_timer = 0
+            self.enemy_dir = self.enemies.march(self.enemy_dir, 10, ENEMY_DESCEND, 10, WIDTH-10)
+            self.level_speedup = self.enemies.size - len(self.enemies)   # fewer invaders → faster
+
+        self.maybe_fire_enemy_bullet()
+        profiler.mark("update")
+        self.collide()
+        profiler.mark("collide")
+        return self.state
+
+    def collide(self):
+        player = self.player
         # Player bullet hits
-        for bullet in bullets:
-            hit_inv = pygame.sprite.spritecollide(bullet,enemies,True)
+        enemies = self.enemies
+        for bullet in self.bullets:
+            hit_inv = enemies.collide(bullet.rect, mask(bullet.image))   # pixel-exact
             if hit_inv:
-                score += hit_inv[0].points
+                self.score += int(enemies.points[hit_inv[0]])
+                for i in hit_inv: enemies.kill(i)
                 bullet.kill()
-                explodes.add(Explosion(hit_inv[0].rect.center, WHITE))
-                if snd_hit: snd_hit.play()
+                self.explode(enemies.rect(hit_inv[0]).center, WHITE)
+                self.play("hit")
         # Enemy bullet hits player
-        if pygame.sprite.spritecollide(player,enemy_bullets,True):
+        if pygame.sprite.spritecollide(player,self.enemy_bullets,True,collide_mask):
             player.lives -=1
-            explodes.add(Explosion(player.rect.center, RED,12))
-            if snd_explosion: snd_explosion.play()
-            if player.lives<=0: 
-                state="GAME_OVER"
-                if bg_music: pygame.mixer.music.stop()
-                if snd_game_over: snd_game_over.play()
+            self.explode(player.rect.center, RED,12)
+            self.play("explosion")
+            if player.lives<=0: self.game_over()
         # Bullets vs shields
-        for grp in (bullets, enemy_bullets):
-            hit_shield = pygame.sprite.groupcollide(grp, shields, True, True)
-            if hit_shield: 
-                # Fix: Get the bullet object from the dictionary
-                bullet = list(hit_shield.keys())[0]
-                explodes.add(Explosion(bullet.rect.center, GREEN,6))
+        for grp, falling in ((self.bullets, False), (self.enemy_bullets, True)):
+            for bullet in grp:
+                for bunker in self.grid.query(bullet.rect):
+                    pos = bunker.hit(bullet.rect, falling)
+                    if pos:
+                        bunker.carve(*pos, SHIELD_BLAST)
+                        bullet.kill()
+                        self.explode(pos, GREEN,6)
+                        break
 
         # Invader reaches bottom / shield
-        if any(enemy.rect.bottom >= player.rect.top for enemy in enemies):
-            state="GAME_OVER"
-            if bg_music: pygame.mixer.music.stop()
-            if snd_game_over: snd_game_over.play()
+        if self.enemies and self.enemies.bottom() >= player.rect.top:
+            self.game_over()
 
         # Win?
-        if not enemies:
-            state="GAME_OVER"
-            if bg_music: pygame.mixer.music.stop()
+        if not self.enemies:
+            self.game_over(sound=False)
+
+    # ─── Replays ───
+    def snapshot(self):
+        """The whole simulation state as numbers and arrays (see replay.py)"""
+        bullets = lambda grp: np.array([(b.rect.x, b.rect.y, b.speed) for b in grp], int).reshape(-1, 3)
+        return {
+            "state": STATES.index(self.state), "frame": self.frame, "score": self.score,
+            "player": (self.player.rect.x, self.player.lives),
+            "march": (self.enemy_dir, self.enemy_timer, self.level_speedup),
+            "alive": self.enemies.alive, "offset": (self.enemies.dx, self.enemies.dy),
+            "shields": np.stack([b.grid for b in self.shields]),
+            "bullets": bullets(self.bullets), "enemy_bullets": bullets(self.enemy_bullets),
+            "rng": replay.rng_state(self.rng),
+        }
+
+    def restore(self, snap):
+        self.build()
+        self.state, self.frame, self.score = STATES[snap["state"]], snap["frame"], snap["score"]
+        self.player.rect.x, self.player.lives = map(int, snap["player"])
+        self.enemy_dir, self.enemy_timer, self.level_speedup = map(int, snap["march"])
+        self.enemies.restore(snap["alive"], *snap["offset"])
+        for bunker, grid in zip(self.shields, snap["shields"]):
+            bunker.grid[:] = grid
+            bunker.redraw(0, 0, grid.shape[1], grid.shape[0])
+        for grp, pool, rows in ((self.bullets, "bullet", snap["bullets"]),
+                                (self.enemy_bullets, "enemy_bullet", snap["enemy_bullets"])):
+            for x, y, speed in rows.tolist():
+                bullet = self.pools[pool].acquire().spawn(0, 0, speed)
+                bullet.rect.topleft = x, y
+                grp.add(bullet)
+        replay.set_rng_state(self.rng, snap["rng"])
 
     # ─── Draw ───
-    # Draw background
-    if bg_image:
-        screen.blit(bg_image, (0, 0))
-    else:
-        screen.fill(BG)
-    if state=="TITLE":
-        t1 = FONT.render("SPACE INVADERS  –  PRESS ANY KEY", True, WHITE)
-        screen.blit(t1, t1.get_rect(center=(WIDTH//2, HEIGHT//2)))
-    elif state=="GAME_OVER":
-        t1 = FONT.render("GAME  OVER  –  PRESS ANY KEY", True, RED)
-        t2 = FONT.render(f"FINAL SCORE: {score}", True, WHITE)
-        screen.blit(t1, t1.get_rect(center=(WIDTH//2, HEIGHT//2-20)))
-        screen.blit(t2, t2.get_rect(center=(WIDTH//2, HEIGHT//2+20)))
-    else:   # PLAYING
-        player_grp.draw(screen)
-        enemies.draw(screen)
-        shields.draw(screen)
-        bullets.draw(screen); enemy_bullets.draw(screen)
-        explodes.draw(screen)
-        draw_hud(score, player.lives)
-
-    pygame.display.flip()
\ No newline at end of file
+    def draw_hud(self, r, font, score, lives):
+        text.number(r, font, WHITE, "Score ", f"{score:04d}", pos=(30,15))
+        for i in range(lives):
+            r.draw_rect(GREEN, pygame.Rect(WIDTH-150+i*35,15,25,15))
+
+    def draw_message(self, r, font, state, score):
+        if state=="TITLE":
+            t1 = text.render(font, "SPACE INVADERS  –  PRESS ANY KEY", WHITE)
+            r.blit(t1, t1.get_rect(center=(WIDTH//2, HEIGHT//2)))
+        else:
+            t1 = text.render(font, "GAME  OVER  –  PRESS ANY KEY", RED)
+            r.blit(t1, t1.get_rect(center=(WIDTH//2, HEIGHT//2-20)))
+            text.number(r, font, WHITE, "FINAL SCORE: ", str(score), center=(WIDTH//2, HEIGHT//2+20))
+
+    def draw(self, r, font):
+        """Draw through a Renderer; background and shields live in its static layer"""
+        if r.scene((self.state, id(self.shields))):
+            for bunker in self.shields: bunker.dirty = True
+        if self.state=="PLAYING":
+            for bunker in self.shields:
+                if bunker.dirty:
+                    r.stamp(bunker.image, bunker.rect)
+                    bunker.dirty = False
+        r.begin()
+        if self.state!="PLAYING":
+            self.draw_message(r, font, self.state, self.score)
+        else:
+            r.blit(self.player.image, self.player.rect)
+            self.enemies.draw(r)
+            r.blits([(b.image, b.rect) for b in self.bullets])
+            r.blits([(b.image, b.rect) for b in self.enemy_bullets])
+            self.particles.draw(r)
+            if self.show_masks: self.draw_masks(r)
+            self.draw_hud(r, font, self.score, self.player.lives)
+        profiler.draw(r, WIDTH)
+
+    # ─── Pipelined mode: the simulation thread publishes views, the main thread draws them ───
+    def view(self):
+        """What draw_view() needs from this step, as an immutable View"""
+        if self.state!="PLAYING": return View(self.games, self.state, self.score, 0, None, None, None, None, ())
+        for i, bunker in enumerate(self.shields):
+            if bunker.dirty or self.shield_views[i] is None:   # hit since the last view: a fresh copy
+                self.shield_views[i] = bunker.image.copy(), bunker.rect.copy()
+                bunker.dirty = False
+        xs, ys = self.enemies.positions()
+        tiers = self.enemies.tier[self.enemies.alive]
+        bullets = [(b.serial, b.rect.x, b.rect.y, b.speed>0) for grp in (self.bullets, self.enemy_bullets) for b in grp]
+        return View(self.games, self.state, self.score, self.player.lives, self.player.rect.topleft,
+                    pipeline.frozen(np.column_stack([xs, ys, tiers])), pipeline.frozen(bullets, 4),
+                    self.particles.view(), tuple(self.shield_views))
+
+    def draw_view(self, r, font, prev, cur, alpha):
+        """draw() from views: cur, with what moves smoothly 1 - alpha of a step back toward prev.
+
+        The invaders march in whole steps, so they are drawn where cur has them.
+        """
+        if r.scene((cur.state, cur.game)): self.stamped = {}
+        for i, (image, rect) in enumerate(cur.shields):
+            if self.stamped.get(i) is not image:
+                r.stamp(image, rect)
+                self.stamped[i] = image
+        r.begin()
+        if cur.state!="PLAYING":
+            self.draw_message(r, font, cur.state, cur.score)
+        else:
+            player = self.player.image
+            invaders, shot, bomb = self.enemies.images, solid((6,18), WHITE), solid((6,18), RED)
+            sprites = [(player, tuple(int(v) for v in pipeline.lerp(prev.player, cur.player, alpha)))]
+            sprites += [(invaders[t], (x, y)) for x, y, t in cur.invaders.astype(int).tolist()]
+            sprites += [(bomb if falling else shot, (x, y)) for _, x, y, falling in
+                        pipeline.tween(prev.bullets, cur.bullets, alpha, cols=[2]).astype(int).tolist()]
+            r.blits(sprites)
+            self.particles.draw_view(r, cur.particles, (1 - alpha)*STEP_MS)
+            if self.show_masks: r.blits([(mask_overlay(image), pos) for image, pos in sprites])
+            self.draw_hud(r, font, cur.score, cur.lives)
+        profiler.draw(r, WIDTH)
+
+    def draw_masks(self, r):
+        r.blit(mask_overlay(self.player.image), self.player.rect)
+        self.enemies.draw_masks(r)
+        r.blits([(mask_overlay(b.image), b.rect) for grp in (self.bullets, self.enemy_bullets) for b in grp])
+
+    def sprite_count(self):
+        return (len(self.enemies) + len(self.bullets) + len(self.enemy_bullets)
+                + len(self.particles) + len(self.shields) + 1)
+
+# ───────── headless runs ─────────
+def random_bot(game, rng):
+    """Wander left/right and fire whenever possible"""
+    inputs = INPUT_FIRE
+    if rng.random()<0.5: inputs |= rng.choice((INPUT_LEFT, INPUT_RIGHT))
+    return inputs
+
+def run_headless(games=1, seed=0, bot=random_bot, max_frames=60*60*10):
+    """Play whole games at a fixed 60 FPS timestep, as fast as possible.
+
+    Returns a list of (score, frames) tuples, one per game.
+    """
+    results = []
+    for n in range(games):
+        game = Invaders(seed=seed+n)
+        bot_rng = random.Random(seed+n)
+        game.reset()
+        while game.state=="PLAYING" and game.frame<max_frames:
+            game.step(bot(game, bot_rng), STEP_MS)
+        results.append((game.score, game.frame))
+    return results
+
+# ───────── main loop ─────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Space Invaders")
+    parser.add_argument("--headless", type=int, metavar="GAMES",
+                        help="play GAMES bot games without a window and print the scores")
+    parser.add_argument("--seed", type=int, help="seed for the enemy RNG")
+    parser.add_argument("--dirty", action="store_true",
+                        help="redraw only changed screen areas instead of the whole frame")
+    parser.add_argument("--backend", choices=BACKENDS, default="surface",
+                        help="draw with software surfaces (default) or SDL2 textures")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save a replay of each game to PATH (the last game wins)")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="record gameplay: a directory of PNGs, or a .y4m / .rgb file")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="update on a thread of its own and draw its snapshots, interpolated")
+    parser.add_argument("--render-fps", type=int, metavar="FPS", default=pipeline.RENDER_FPS,
+                        help=f"with --pipelined, cap drawing at FPS (default {pipeline.RENDER_FPS}, 0: none)")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="never shed effects to hold the frame rate")
+    parser.add_argument("--show-masks", action="store_true",
+                        help="draw the pixel masks used for hit tests (F4 toggles)")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-phase frame timings (F3 toggles the overlay)")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="on exit, write the recorded frames to PATH (.json or .csv)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print a time-to-first-frame breakdown")
+    args = parser.parse_args(argv)
+    profiler.enabled = args.profile or bool(args.profile_out)
+
+    if args.headless:
+        init_pygame(headless=True)
+        for score, frames in run_headless(args.headless, seed=args.seed or 0):
+            print(f"score={score} frames={frames}")
+        return
+
+    # Staged startup: just enough for the title screen, everything else on a thread
+    timer = Stopwatch()
+    pygame.display.init(); pygame.font.init()
+    timer.lap("display init")
+    font   = system_font("consolas", 28)
+    timer.lap("font")
+    display = open_display((WIDTH, HEIGHT), args.backend, "Space Invaders")
+    timer.lap("set_mode")
+    backdrop = load_background()
+    renderer = make_renderer(display, backdrop, dirty=args.dirty)
+    if args.capture: renderer.capture = Capture(args.capture, (WIDTH, HEIGHT), FPS)
+    plain    = converted(pygame.Surface((WIDTH, HEIGHT)), alpha=False)
+    plain.fill(BG)
+    timer.lap("background")
+    loader = Loader(seed=args.seed, timer=timer)
+    loader.start()
+    clock  = pygame.time.Clock()
+    game   = Invaders(seed=args.seed)
+    game.show_masks = args.show_masks
+    music  = None
+    steps  = quality.FixedStep(STEP_MS)         # same game speed whatever the frame rate
+    fire   = 0
+    seeds  = random.Random(args.seed)           # every game gets its own seed, for replays
+    recorder = None
+    governor = None if args.fixed_quality else quality.Governor(FPS)
+    paused   = False
+    redraw   = True                             # idle screens are only drawn when this is set
+    def apply_quality():
+        if governor:
+            quality.apply(governor.tier, renderer, backdrop, plain, [game.particles], music, args.dirty,
+                          game.sounds)
+
+    def play_step(bits):                        # recorded first when recording
+        if recorder: recorder.record(bits)
+        game.step(bits, STEP_MS)
+    sim = None
+    if args.pipelined:                          # updates on a thread of their own, see pipeline.py
+        sim = pipeline.Simulation(play_step, game.view, STEP_MS,
+                                  active=lambda: game.state=="PLAYING" and not paused)
+        sim.start()
+    lock  = sim.lock if sim else nullcontext()  # the simulation waits while the game is changed
+    shown = None                                # (state, paused) when last drawn
+
+    while True:
+        profiler.begin_frame()
+        # Title, pause and game over don't move: sleep until input instead of ticking at 60 FPS.
+        # A pipelined game ends on the other thread, so that state may not have been drawn yet.
+        idle = ((game.state!="PLAYING" or paused) and not redraw and not profiler.overlay
+                and (game.state, paused)==shown)
+        if idle:
+            events = quality.wait_events()
+            clock.tick(); steps.reset()             # the sleep is neither frame time nor time owed
+            dt = 0
+            profiler.mark("idle")
+        else:
+            dt = clock.tick(args.render_fps if sim else FPS)
+            if governor and governor.update(clock.get_rawtime()): apply_quality()
+            profiler.mark("tick")
+            events = pygame.event.get()
+        redraw = quality.needs_redraw(events)
+        keys = pygame.key.get_pressed()
+        inputs = 0
+        if keys[pygame.K_LEFT]:  inputs |= INPUT_LEFT
+        if keys[pygame.K_RIGHT]: inputs |= INPUT_RIGHT
+        with lock:
+            for e in events:
+                if e.type==pygame.QUIT:
+                    if sim: sim.stop()
+                    if recorder: recorder.save(args.record)
+                    if args.profile_out: profiler.export(args.profile_out)
+                    if renderer.capture: renderer.capture.close()
+                    pygame.quit(); sys.exit()
+                if e.type==pygame.KEYDOWN and e.key==pygame.K_F3:
+                    profiler.toggle_overlay(); continue
+                if e.type==pygame.KEYDOWN and e.key==pygame.K_F4:
+                    game.show_masks = not game.show_masks; continue
+                if game.state=="PLAYING" and (e.type==pygame.KEYDOWN and e.key in (pygame.K_p, pygame.K_ESCAPE)
+                                              or e.type==pygame.WINDOWFOCUSLOST and not paused):
+                    paused = not paused
+                    if music: music.stop() if paused else music.play()
+                    continue
+                if paused: continue
+                if game.state=="PLAYING" and e.type==pygame.KEYDOWN and e.key==pygame.K_SPACE:
+                    inputs |= INPUT_FIRE
+                if game.state in ("TITLE","GAME_OVER") and e.type==pygame.KEYDOWN:
+                    if music is None:                  # first game: assets must be in by now
+                        loader.wait()
+                        music = game.music = loader.music
+                        game.sounds = loader.sounds
+                        apply_quality()
+                    seed = seeds.randrange(2**32)
+                    game.reset(seed)
+                    if args.record:
+                        recorder = replay.Recorder(game, seed, STEP_MS, {"game": "invaders", "options": game.options})
+                    if sim: sim.publish()
+            profiler.mark("events")
+
+            # ─── Update world ───
+            fire |= inputs & INPUT_FIRE              # a press waits for the next step
+            if sim:
+                sim.input(inputs & ~INPUT_FIRE, fire)
+                fire = 0
+            for _ in range(0 if paused or sim else steps.advance(dt)):
+                play_step(inputs & ~INPUT_FIRE | fire)
+                fire = 0
+            if recorder and game.state!="PLAYING":
+                recorder.save(args.record)
+                recorder = None
+            if music:
+                music.intensity = game.level_speedup/game.enemies.size   # speeds up with the invaders
+                music.pump()
+            state = game.state, paused
+            grid = game.grid.frame_stats() if hasattr(game, "grid") else None   # reset every frame, profiled or not
+        if sim: sim.wake()
+        profiler.mark("audio")
+
+        # ─── Draw ───
+        redraw |= state!=shown
+        if not idle or redraw:
+            if sim: game.draw_view(renderer, font, *sim.frames.latest())
+            else:   game.draw(renderer, font)
+            if paused:
+                t1 = text.render(font, "PAUSED  –  P TO RESUME", WHITE)
+                renderer.blit(t1, t1.get_rect(center=(WIDTH//2, HEIGHT//2)))
+            profiler.mark("draw")
+            renderer.present()
+            shown = state
+            profiler.mark("present")
+        if args.profile_startup and timer:
+            timer.lap("first frame")
+            loader.wait()
+            print(timer.report("Startup (bg = background thread, overlaps the title screen):"))
+            timer = None
+        if profiler.enabled and game.state=="PLAYING":
+            profiler.gauge("sprites", game.sprite_count())
+            for key in ("queries", "candidates", "hits"): profiler.gauge(f"grid_{key}", grid[key])
+        if governor: profiler.gauge("tier", governor.tier)
+        profiler.end_frame()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import queue
+import random
+import threading
+
+import numpy as np
+import pygame
+
+from soundbank import reserve
+from synth import adsr, sine, square
+
+ROOT  = 110.0                              # A2
+SCALE = [0, 3, 5, 7, 10]                   # minor pentatonic, in semitones
+
+
+def pitch(degree):
+    octave, step = divmod(degree, len(SCALE))
+    return ROOT*2**(octave + SCALE[step]/12)
+
+
+# ───────── generator pipeline ─────────
+def notes(rng, stream):
+    """Endless random walk over the scale: (lead_hz, bass_hz, seconds) per note.
+
+    Tempo and intensity are read again for every note, so the music follows
+    the game with only the ring's worth of latency.
+    """
+    degree = 5
+    while True:
+        beat = 60.0/(stream.tempo*(1 + stream.intensity))
+        bass = pitch(rng.choice((0, 0, 3, 2)) - 5)
+        for _ in range(8):                 # one bar of eighth notes over one bass note
+            degree = min(12, max(3, degree + rng.choice((-2, -1, -1, 1, 1, 2))))
+            rest = rng.random()<0.3 - 0.25*stream.intensity or not stream.lead
+            yield (0.0 if rest else pitch(degree)), bass, beat/2
+
+def voices(note_stream, sample_rate):
+    """Turn notes into float samples: square-wave lead over a sine bass"""
+    for lead, bass, seconds in note_stream:
+        n = int(seconds*sample_rate)
+        out = 0.5*sine(bass, n, sample_rate)*adsr(n, 0.005, 0.05, 0.7, 0.02, sample_rate)
+        if lead:
+            out += 0.25*square(lead, n, sample_rate)*adsr(n, 0.005, 0.08, 0.4, 0.03, sample_rate)
+        yield out
+
+def blocks(sample_stream, size):
+    """Re-chunk a stream of arbitrary-length arrays into fixed-size blocks"""
+    buf = np.zeros(size)
+    fill = 0
+    for chunk in sample_stream:
+        while len(chunk):
+            take = min(size - fill, len(chunk))
+            buf[fill:fill + take] = chunk[:take]
+            fill += take; chunk = chunk[take:]
+            if fill==size:
+                yield buf
+                buf = np.zeros(size)
+                fill = 0
+
+
+class MusicStream:
+    """Procedural background music streamed block by block on its own channel.
+
+    A worker thread runs the notes -> voices -> blocks pipeline and keeps a
+    small queue of finished blocks ahead of playback.  pump(), called once a
+    frame, copies a finished block into the next Sound of a fixed ring and
+    queues it on the channel; it never waits, so a slow render only ever
+    costs a gap in the music, not a frame.  Memory stays fixed however long
+    the music runs, and it never repeats.
+
+    tempo (bpm), intensity (0..1) and lead (False leaves just the bass) can
+    be changed at any time.
+    """
+    def __init__(self, seed=None, tempo=100, intensity=0.0, volume=0.3, block=0.25, ring=3, channel=0):
+        self.tempo, self.intensity = tempo, intensity
+        self.lead = True
+        self.enabled = bool(pygame.mixer.get_init())
+        if not self.enabled: return
+        self.sample_rate, fmt, channels = pygame.mixer.get_init()
+        self.block = int(block*self.sample_rate)
+        # keep the music channel out of Sound.play()'s automatic channel picks
+        reserve(channel + 1)
+        self.channel = pygame.mixer.Channel(channel)
+        self.channel.set_volume(volume)
+        # silent Sounds in the mixer's own format; their samples get overwritten in place
+        size = self.block*channels*(abs(fmt)//8)
+        self.ring = [pygame.mixer.Sound(buffer=bytes(size)) for _ in range(ring)]
+        self.next = 0
+        self.dtype = pygame.sndarray.samples(self.ring[0]).dtype
+        self.ready = queue.Queue(maxsize=ring - 1)
+        self.rng = random.Random(seed)
+        self.playing = False
+        self.stopping = threading.Event()
+        self.worker = threading.Thread(target=self.render, daemon=True)
+        self.worker.start()
+
+    def render(self):
+        scale = np.iinfo(self.dtype).max if self.dtype.kind=="i" else 1.0
+        for buf in blocks(voices(notes(self.rng, self), self.sample_rate), self.block):
+            buf = (np.clip(buf, -1.0, 1.0)*scale).astype(self.dtype)
+            while not self.stopping.is_set():
+                try:
+                    self.ready.put(buf, timeout=0.1); break
+                except queue.Full:
+                    continue
+            else:
+                return
+
+    def play(self):
+        self.playing = True
+
+    def stop(self):
+        self.playing = False
+        if self.enabled: self.channel.stop()
+
+    def close(self):
+        self.stop()
+        if self.enabled: self.stopping.set()
+
+    def pump(self):
+        """Feed the channel if it has room; call once per frame"""
+        if not (self.enabled and self.playing): return
+        if self.channel.get_busy() and self.channel.get_queue() is not None: return
+        try:
+            buf = self.ready.get_nowait()
+        except queue.Empty:
+            return                                   # renderer fell behind: a short gap
+        sound = self.ring[self.next]
+        self.next = (self.next + 1) % len(self.ring)
+        samples = pygame.sndarray.samples(sound)
+        samples[...] = buf[:, None] if samples.ndim>1 else buf
+        del samples                                  # unlock the sound
+        if self.channel.get_busy():
+            self.channel.queue(sound)
+        else:
+            self.channel.play(sound)
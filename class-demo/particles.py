@@ -0,0 +1,131 @@
+import math
+
+import numpy as np
+
+_ramps = {}
+
+
+def alpha_ramp(surface, levels=16, max_alpha=255):
+    """Copies of surface at `levels` rising alpha steps, made once per surface"""
+    key = surface, levels, max_alpha
+    ramp = _ramps.get(key)
+    if ramp is None:
+        ramp = []
+        for i in range(levels):
+            faded = surface.copy()
+            faded.set_alpha(round(max_alpha*(i + 1)/levels))
+            ramp.append(faded)
+        _ramps[key] = ramp
+    return ramp
+
+
+class Particles:
+    """Fixed-capacity particle buffer kept in NumPy arrays.
+
+    Position, velocity and remaining/total lifetime live in preallocated
+    arrays, so update() is a few vectorized operations however many
+    particles there are, and nothing is allocated per particle.  Particles
+    fade out over their lifetime by picking a pre-faded copy from their
+    sprite's alpha ramp, and draw() hands all of them to one blits() call.
+    Positions are particle centres; velocities are in px/ms.  view() and
+    draw_view() split drawing in two for the pipelined mode (pipeline.py).
+    """
+    def __init__(self, capacity=1024, levels=16, gravity=0.0, seed=None):
+        self.pos   = np.zeros((capacity, 2), np.float32)
+        self.vel   = np.zeros((capacity, 2), np.float32)
+        self.life  = np.zeros(capacity, np.float32)
+        self.ttl   = np.ones(capacity, np.float32)
+        self.kind  = np.zeros(capacity, np.int32)
+        self.alive = np.zeros(capacity, bool)
+        self.levels, self.gravity = levels, gravity
+        self.rng   = np.random.default_rng(seed)
+        self.kinds = {}                            # surface -> kind id
+        self.ramps = []
+        self.half  = np.zeros((0, 2), np.float32)  # half size per kind
+        self.dropped = 0                           # emits that found the buffer full
+        self.detail = 1.0                          # fraction of emitted particles kept
+        self.credit = 0.0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    def sprite(self, surface, max_alpha=255):
+        """Register a surface to draw particles with; returns its kind id"""
+        kind = self.kinds.get((surface, max_alpha))
+        if kind is None:
+            kind = self.kinds[surface, max_alpha] = len(self.ramps)
+            self.ramps.append(alpha_ramp(surface, self.levels, max_alpha))
+            self.half = np.vstack([self.half, np.array(surface.get_size(), np.float32)/2])
+        return kind
+
+    def slots(self, n):
+        free = np.flatnonzero(~self.alive)[:n]
+        self.dropped += n - len(free)
+        return free
+
+    def emit(self, x, y, n, kind, speed=(0.05, 0.25), life=(250, 500)):
+        """Burst of n particles flying out from (x, y) in random directions"""
+        idx = self.slots(max(1, round(n*self.detail)))
+        k = len(idx)
+        if not k: return
+        angle = self.rng.uniform(0, 2*math.pi, k)
+        spd = self.rng.uniform(speed[0], speed[1], k)
+        self.pos[idx] = x, y
+        self.vel[idx, 0] = np.cos(angle)*spd
+        self.vel[idx, 1] = np.sin(angle)*spd
+        ttl = self.rng.uniform(life[0], life[1], k)
+        self.life[idx] = ttl
+        self.ttl[idx] = ttl
+        self.kind[idx] = kind
+        self.alive[idx] = True
+
+    def emit_one(self, x, y, kind, life, vx=0.0, vy=0.0):
+        self.credit += self.detail               # below full detail, skip some evenly
+        if self.credit<1: return
+        self.credit -= 1
+        idx = self.slots(1)
+        if not len(idx): return
+        i = idx[0]
+        self.pos[i] = x, y
+        self.vel[i] = vx, vy
+        self.life[i] = self.ttl[i] = life
+        self.kind[i] = kind
+        self.alive[i] = True
+
+    def update(self, dt):
+        """Advance every particle by dt ms in one pass"""
+        if not self.alive.any(): return
+        self.pos += self.vel*dt
+        if self.gravity: self.vel[:, 1] += self.gravity*dt
+        self.life -= dt
+        self.alive &= self.life > 0
+
+    def clear(self):
+        self.alive[:] = False
+
+    def draw(self, target):
+        """Blit all live particles with one blits() call (Surface or Renderer)"""
+        idx = np.flatnonzero(self.alive)
+        if not len(idx): return []
+        kind = self.kind[idx]
+        level = np.minimum((self.life[idx]/self.ttl[idx]*self.levels).astype(np.int32), self.levels - 1)
+        xy = (self.pos[idx] - self.half[kind]).astype(np.int32).tolist()
+        ramps = self.ramps
+        return target.blits([(ramps[k][lv], p) for k, lv, p in zip(kind.tolist(), level.tolist(), xy)])
+
+    def view(self):
+        """Live particles as a read-only (n, 6) array: x, y, vx, vy, kind, alpha level"""
+        idx = np.flatnonzero(self.alive)
+        level = np.minimum((self.life[idx]/self.ttl[idx]*self.levels).astype(np.int32), self.levels - 1)
+        rows = np.column_stack([self.pos[idx], self.vel[idx], self.kind[idx], level]).astype(np.float32)
+        rows.flags.writeable = False
+        return rows
+
+    def draw_view(self, target, rows, back_ms=0.0):
+        """draw() for a view(), with every particle moved back_ms along its velocity"""
+        if not len(rows): return []
+        kind = rows[:, 4].astype(np.int32)
+        xy = (rows[:, :2] - rows[:, 2:4]*back_ms - self.half[kind]).astype(np.int32).tolist()
+        ramps = self.ramps
+        return target.blits([(ramps[k][lv], p) for k, lv, p in
+                             zip(kind.tolist(), rows[:, 5].astype(np.int32).tolist(), xy)])
@@ -0,0 +1,140 @@
+"""Pipelined mode: the simulation on its own fixed-rate thread, drawing from its snapshots.
+
+    python dash.py --pipelined                  # or main.py; --render-fps caps the drawing
+
+Normally each frame runs the game's updates and then draws, so a slow draw
+or display flip holds the simulation up.  Here a Simulation thread steps the
+game every step_ms and, after each step, publishes the game's view(): an
+immutable snapshot of just what drawing needs (positions, sprite kinds, HUD
+values) as tuples and read-only arrays.  The main thread only draws, always
+from the latest two views, interpolating between them, so blits and flips
+(which release the GIL) overlap the next steps on another core.
+
+Views are namedtuples with a `game` field that changes whenever a new game
+starts, so nothing is interpolated across a restart.  Moving things carry a
+stable id in column 0 of their rows, so tween() can pair them up between
+views.
+"""
+import threading
+import time
+
+import numpy as np
+
+import quality
+
+RENDER_FPS = 120
+
+
+def frozen(rows, width=None):
+    """rows as a read-only float array; width shapes an empty list as (0, width)"""
+    a = np.array(rows, float)
+    if width is not None: a = a.reshape(-1, width)
+    a.flags.writeable = False
+    return a
+
+
+def lerp(a, b, alpha):
+    return tuple(x + (y - x)*alpha for x, y in zip(a, b))
+
+
+def tween(prev, cur, alpha, cols=(1, 2)):
+    """cur's rows with cols moved back toward the prev row of the same id (column 0).
+
+    alpha 1 is cur itself; rows without a match in prev are left where they are.
+    """
+    out = np.array(cur)
+    if len(prev) and len(cur):
+        _, p, c = np.intersect1d(prev[:, 0], cur[:, 0], assume_unique=True, return_indices=True)
+        cols = list(cols)
+        out[c[:, None], cols] = prev[p[:, None], cols] + (cur[c[:, None], cols] - prev[p[:, None], cols])*alpha
+    return out
+
+
+class DoubleBuffer:
+    """The two latest views, swapped in under a lock.
+
+    latest() returns (previous, current, alpha), alpha being how much of a
+    step has passed since current was published (capped at 1), which is how
+    far to draw from previous toward current.
+    """
+    def __init__(self, step_ms):
+        self.step_ms = step_ms
+        self.lock = threading.Lock()
+        self.prev = self.cur = None
+        self.at = 0.0
+        self.published = 0
+
+    def publish(self, view):
+        with self.lock:
+            self.prev, self.cur = self.cur, view
+            self.at = time.perf_counter()
+            self.published += 1
+
+    def latest(self):
+        with self.lock:
+            prev, cur, at = self.prev, self.cur, self.at
+        if prev is None or prev.game!=cur.game: prev = cur
+        return prev, cur, min(1.0, (time.perf_counter() - at)*1000/self.step_ms)
+
+
+class Simulation(threading.Thread):
+    """Calls step(inputs) every step_ms and publishes view() after each step.
+
+    Steps are paced with quality.FixedStep on the wall clock, so they keep
+    their rate however long frames take to draw.  While active() is false
+    (title, pause, game over) the thread sleeps until wake().  input() sets
+    the held keys and adds presses, which go to the next step only.
+
+    The game is only touched with lock held: the thread holds it for each
+    step, and the main thread takes it to change the game (new game, pause)
+    and then calls publish() so the next frame shows the change.
+    """
+    def __init__(self, step, view, step_ms, active=lambda: True, max_steps=4):
+        super().__init__(daemon=True)
+        self.step_fn, self.view, self.step_ms, self.active = step, view, step_ms, active
+        self.steps = quality.FixedStep(step_ms, max_steps)
+        self.frames = DoubleBuffer(step_ms)
+        self.lock = threading.RLock()
+        self.woken = threading.Event()
+        self.held = self.pressed = 0
+        self.running = True
+        self.publish()
+
+    def input(self, held=0, pressed=0):
+        with self.lock:
+            self.held = held
+            self.pressed |= pressed
+
+    def publish(self):
+        with self.lock:
+            self.frames.publish(self.view())
+
+    def wake(self):
+        self.woken.set()
+
+    def stop(self):
+        """No step starts once this returns; the thread then exits"""
+        with self.lock:
+            self.running = False
+        self.woken.set()
+
+    def run(self):
+        last = time.perf_counter()
+        while self.running:
+            with self.lock:
+                active = self.active()
+            if not active:
+                self.woken.wait(quality.IDLE_WAIT_MS/1000)
+                self.woken.clear()
+                self.steps.reset()
+                last = time.perf_counter()
+                continue
+            now = time.perf_counter()
+            for _ in range(self.steps.advance((now - last)*1000)):
+                with self.lock:
+                    if not (self.running and self.active()): break
+                    inputs, self.pressed = self.held | self.pressed, 0
+                    self.step_fn(inputs)
+                    self.frames.publish(self.view())   # before the lock goes, so a game over is seen with its view
+            last = now
+            time.sleep(max(0.0, self.step_ms - self.steps.acc)/1000)
@@ -0,0 +1,45 @@
+class Pool:
+    """Fixed-capacity free list so short-lived objects get reused, not reallocated.
+
+    acquire() hands out a free object, building a new one only when the pool
+    has run dry (counted as an overflow); release() takes it back.  At most
+    capacity idle objects are kept, so an overflow burst can't grow the pool
+    for good.  Objects keep their surfaces between uses, so once the pool is
+    warm a frame allocates nothing.
+
+    factory(pool) builds one object; it gets the pool so objects can release
+    themselves (e.g. from Sprite.kill).
+    """
+    def __init__(self, factory, capacity):
+        self.factory  = factory
+        self.capacity = capacity
+        self.free     = [factory(self) for _ in range(capacity)]
+        self.active   = set()
+        self.acquired = self.overflows = self.peak = 0
+
+    def __len__(self):
+        return len(self.active)
+
+    def acquire(self):
+        if self.free:
+            obj = self.free.pop()
+        else:
+            obj = self.factory(self)
+            self.overflows += 1
+        self.active.add(obj)
+        self.acquired += 1
+        if len(self.active)>self.peak: self.peak = len(self.active)
+        return obj
+
+    def release(self, obj):
+        """Return obj to the pool; releasing twice is harmless"""
+        if obj not in self.active: return
+        self.active.remove(obj)
+        if len(self.free)<self.capacity: self.free.append(obj)
+
+    def release_all(self):
+        for obj in list(self.active): self.release(obj)
+
+    def stats(self):
+        return {"capacity": self.capacity, "free": len(self.free), "active": len(self.active),
+                "peak": self.peak, "acquired": self.acquired, "overflows": self.overflows}
@@ -0,0 +1,154 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+
+class Profiler:
+    """Opt-in frame profiler: per-phase times, per-frame counters, overlay.
+
+    Call begin_frame() at the top of the loop, mark(phase) after each phase
+    (the time since the previous mark is booked to it) and end_frame() at the
+    bottom.  count() and gauge() record per-frame numbers such as blits or
+    sprites.  Every method returns immediately while disabled, so the hooks
+    can stay in the hot path.  The last `window` frames are kept for the
+    rolling stats, the overlay and export().  Phases belong to the thread
+    that began the frame; marks from any other thread (the pipelined
+    simulation, see pipeline.py) are ignored.
+    """
+    def __init__(self, window=300):
+        self.enabled = False
+        self.overlay = False
+        self.window  = window
+        self.frames  = deque(maxlen=window)      # one dict per finished frame
+        self.current = {}
+        self.counters = {}
+        self.last = 0.0
+        self.frame_no = 0
+        self.font = None
+        self.thread = None
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        if self.overlay: self.enabled = True
+
+    # ─── hooks ───
+    def begin_frame(self):
+        if not self.enabled: return
+        self.current, self.counters = {}, {}
+        self.thread = threading.get_ident()
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled or threading.get_ident()!=self.thread: return
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last)*1000
+        self.last = now
+
+    def count(self, name, n=1):
+        if not self.enabled: return
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        if not self.enabled: return
+        self.counters[name] = value
+
+    def end_frame(self):
+        if not self.enabled or not hasattr(self, "start"): return
+        self.frame_no += 1
+        record = {"frame": self.frame_no, "total": (time.perf_counter() - self.start)*1000}
+        record.update(self.current)
+        record.update(self.counters)
+        self.frames.append(record)
+
+    # ─── stats ───
+    def series(self, key):
+        return np.array([f.get(key, 0) for f in self.frames], dtype=float)
+
+    def keys(self):
+        keys = {}
+        for f in self.frames: keys.update(dict.fromkeys(f))
+        keys.pop("frame", None)
+        return list(keys)
+
+    def summary(self):
+        """mean/p50/p95/p99/max over the rolling window for every phase and counter"""
+        out = {}
+        for key in self.keys():
+            s = self.series(key)
+            out[key] = {"mean": float(s.mean()), "p50": float(np.percentile(s, 50)),
+                        "p95": float(np.percentile(s, 95)), "p99": float(np.percentile(s, 99)),
+                        "max": float(s.max())}
+        return out
+
+    def histogram(self, key="total", bins=20):
+        counts, edges = np.histogram(self.series(key), bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    def export(self, path):
+        """Write the window as JSON (summary + frames) or CSV (one row per frame)"""
+        if path.endswith(".csv"):
+            keys = ["frame"] + self.keys()
+            with open(path, "w", newline="") as fh:
+                writer = csv.DictWriter(fh, fieldnames=keys, restval=0)
+                writer.writeheader()
+                writer.writerows(self.frames)
+        else:
+            with open(path, "w") as fh:
+                json.dump({"summary": self.summary(), "histogram": self.histogram(),
+                           "frames": list(self.frames)}, fh, indent=1)
+
+    # ─── overlay ───
+    def draw(self, target, width):
+        """Draw the stats panel in the top right; target is a Surface or Renderer"""
+        if not (self.overlay and self.frames): return
+        if self.font is None: self.font = pygame.font.Font(None, 18)
+        recent = list(self.frames)[-60:]
+        lines = []
+        for key in self.keys():
+            vals = [f.get(key, 0) for f in recent]
+            mean = sum(vals)/len(vals)
+            lines.append(f"{key:>9s} {mean:7.2f} max {max(vals):7.2f}")
+        x, y = width - 230, 45
+        panel = pygame.Surface((220, 14*len(lines) + 50), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            panel.blit(self.font.render(line, True, (255, 255, 255)), (6, 4 + 14*i))
+        # frame-time graph, 16.6 ms budget line in red
+        base, scale = panel.get_height() - 4, 40/33.3
+        pygame.draw.line(panel, (220, 40, 40), (6, base - 16.6*scale), (214, base - 16.6*scale))
+        totals = [f["total"] for f in recent]
+        if len(totals)>1:
+            pts = [(6 + i*208/(len(totals)-1), base - min(t, 33.3)*scale) for i, t in enumerate(totals)]
+            pygame.draw.lines(panel, (0, 210, 0), False, pts)
+        target.blit(panel, (x, y))
+
+
+class Stopwatch:
+    """Named laps since creation, for one-off timings such as startup"""
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.laps = []
+        self.lock = threading.Lock()
+
+    def lap(self, name, since=None):
+        """Record the time since the previous lap (or since `since`)"""
+        now = time.perf_counter()
+        with self.lock:
+            self.laps.append((name, (now - (self.last if since is None else since))*1000,
+                              (now - self.start)*1000))
+            if since is None: self.last = now
+
+    def report(self, title):
+        lines = [title]
+        for name, ms, at in self.laps:
+            lines.append(f"  {name:<20s} {ms:8.1f} ms   (at {at:8.1f} ms)")
+        return "\n".join(lines)
+
+
+# Shared by the game loop and anything it calls
+profiler = Profiler()
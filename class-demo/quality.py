@@ -0,0 +1,116 @@
+import sys
+from collections import deque
+
+import numpy as np
+import pygame
+
+# Quality tiers; each one also sheds everything the tiers before it shed
+TIERS = "full", "fewer particles", "plain background", "dirty rects", "reduced audio"
+PARTICLES, BACKGROUND, DIRTY, AUDIO = 1, 2, 3, 4
+
+# Idle screens (title, pause, game over) sleep in event.wait for at most this long
+IDLE_WAIT_MS = 1000
+# Events that mean an idle screen has to be drawn again
+REDRAW_EVENTS = {pygame.KEYDOWN, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN,
+                 pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED}
+
+
+class FixedStep:
+    """Turns real frame times into a whole number of fixed simulation steps.
+
+    The games move things a fixed amount per update, so running one update
+    per drawn frame makes them slow down with the frame rate.  advance(dt)
+    says how many updates this frame owes instead, keeping gameplay at the
+    same speed on slow machines.  Past max_steps a frame drops the backlog
+    rather than spiralling.
+    """
+    def __init__(self, step_ms, max_steps=4):
+        self.step_ms, self.max_steps = step_ms, max_steps
+        self.acc = 0.0
+
+    def advance(self, dt):
+        self.acc += dt
+        n = min(int(self.acc//self.step_ms), self.max_steps)
+        self.acc = self.acc - n*self.step_ms if n<self.max_steps else 0.0
+        return n
+
+    def reset(self):
+        """Forget time owed, e.g. after sleeping on an idle screen"""
+        self.acc = 0.0
+
+
+def wait_events(timeout=IDLE_WAIT_MS):
+    """Sleep until an event arrives or timeout ms pass; returns the pending events.
+
+    Loops call this instead of Clock.tick() while nothing on screen moves,
+    so an idle screen costs a wakeup a second rather than 60 frames.
+    """
+    first = pygame.event.wait(timeout)
+    events = pygame.event.get()
+    return events if first.type==pygame.NOEVENT else [first] + events
+
+
+def needs_redraw(events):
+    return any(e.type in REDRAW_EVENTS for e in events)
+
+
+class Governor:
+    """Steps quality down while frames run over budget, and back up with headroom.
+
+    Call update(work_ms) once a frame with the time spent working, i.e.
+    without the sleep in Clock.tick (Clock.get_rawtime()).  Once a full
+    window has been seen, a p90 over `high` of the frame budget sheds the
+    next tier; a p90 under `low` restores one, but only after `hold` frames
+    at the current tier so it doesn't flap.  update() returns True when the
+    tier changed; changes keeps (frame, old, new, reason) for each one.
+    """
+    def __init__(self, fps=60, window=60, high=0.9, low=0.5, hold=300, verbose=True):
+        self.budget = 1000/fps
+        self.high, self.low, self.hold = high, low, hold
+        self.samples = deque(maxlen=window)
+        self.tier = 0
+        self.frame = self.since = 0
+        self.reason = "start"
+        self.changes = deque(maxlen=50)
+        self.verbose = verbose
+
+    @property
+    def name(self):
+        return TIERS[self.tier]
+
+    def update(self, work_ms):
+        self.frame += 1
+        self.samples.append(work_ms)
+        if len(self.samples)<self.samples.maxlen: return False
+        p90 = float(np.percentile(self.samples, 90))
+        if p90 > self.budget*self.high and self.tier<len(TIERS) - 1:
+            return self.set(self.tier + 1, f"p90 {p90:.1f} ms > {self.budget*self.high:.1f} ms")
+        if (p90 < self.budget*self.low and self.tier>0
+                and self.frame - self.since>=self.hold):
+            return self.set(self.tier - 1, f"p90 {p90:.1f} ms < {self.budget*self.low:.1f} ms")
+        return False
+
+    def set(self, tier, reason):
+        self.changes.append((self.frame, self.tier, tier, reason))
+        if self.verbose:
+            print(f"quality: {TIERS[self.tier]} -> {TIERS[tier]} ({reason})", file=sys.stderr)
+        self.tier, self.reason, self.since = tier, reason, self.frame
+        self.samples.clear()                     # judge the new tier on its own frames
+        return True
+
+
+def apply(tier, renderer, backdrop, plain, particles=(), music=None, dirty=False, sounds=None):
+    """Switch every optional feature on or off for tier.
+
+    backdrop/plain are the background image and its plain-fill stand-in;
+    dirty is the user's --dirty choice, which the governor never turns off.
+    sounds is the game's SoundBank, which keeps to fewer voices at AUDIO.
+    """
+    for fx in particles:
+        fx.detail = 0.25 if tier>=PARTICLES else 1.0
+    renderer.set_backdrop(plain if tier>=BACKGROUND else backdrop)
+    if renderer.dirty != (dirty or tier>=DIRTY):
+        renderer.dirty = dirty or tier>=DIRTY
+        renderer.invalidate()
+    if music: music.lead = tier<AUDIO
+    if sounds: sounds.reduced = tier>=AUDIO
@@ -0,0 +1,210 @@
+import sys
+import weakref
+
+import pygame
+
+from profiler import profiler
+
+BACKENDS = "surface", "texture", "software"
+
+
+class Renderer:
+    """Draws frames over a cached static layer, optionally with dirty rects.
+
+    The static layer is the backdrop (background image or fill) with
+    anything that rarely changes stamped on top of it: ground, shields,
+    constant labels.  Games draw the moving parts through blit()/blits()/
+    draw_rect(), which remember where they drew.
+
+    Full mode blits the whole static layer and flips, like the original
+    loops.  Dirty mode only restores the static layer under last frame's
+    rects and hands last + this frame's rects to display.update(), which is
+    much cheaper on software SDL when little of the screen moves.
+
+    Set capture to a capture.Capture to record every presented frame.
+    """
+    def __init__(self, screen, backdrop, dirty=False):
+        self.screen   = screen
+        self.backdrop = backdrop
+        self.static   = backdrop.copy()
+        self.dirty    = dirty
+        self.scene_key = None
+        self.full     = True              # next frame repaints everything
+        self.prev, self.rects, self.pending = [], [], []
+        self.capture  = None
+
+    # ─── static layer ───
+    def scene(self, key):
+        """Start a fresh static layer whenever key changes; True if it did"""
+        if key==self.scene_key: return False
+        self.scene_key = key
+        self.static.blit(self.backdrop, (0, 0))
+        self.full = True
+        return True
+
+    def stamp(self, image, rect, area=None):
+        """Draw image into the static layer, replacing what was there"""
+        rect = pygame.Rect(rect.topleft, image.get_size() if area is None else area.size)
+        self.static.blit(self.backdrop, rect, rect)
+        self.static.blit(image, rect, area)
+        self.pending.append(rect)
+
+    def set_backdrop(self, backdrop):
+        """Swap the backdrop; the next scene() call rebuilds the static layer"""
+        if backdrop is self.backdrop: return
+        self.backdrop = backdrop
+        self.scene_key = None
+
+    def invalidate(self):
+        self.full = True
+
+    # ─── per frame ───
+    def begin(self):
+        screen, static = self.screen, self.static
+        if self.full or not self.dirty:
+            screen.blit(static, (0, 0))
+        else:
+            for r in self.prev: screen.blit(static, r, r)
+            for r in self.pending: screen.blit(static, r, r)
+
+    def blit(self, image, dest, area=None):
+        r = self.screen.blit(image, dest, area)
+        self.rects.append(r)
+        return r
+
+    def blits(self, seq, doreturn=True):
+        rects = self.screen.blits(seq)
+        self.rects.extend(rects)
+        return rects if doreturn else None
+
+    def draw_rect(self, color, rect, width=0):
+        r = pygame.draw.rect(self.screen, color, rect, width)
+        self.rects.append(r)
+        return r
+
+    def present(self):
+        profiler.count("blits", len(self.rects))
+        if self.full or not self.dirty:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.prev + self.pending + self.rects)
+        self.prev, self.rects, self.pending = self.rects, [], []
+        self.full = False
+        if self.capture: self.capture.grab(self.screen)
+
+
+class TextureRenderer:
+    """Renderer with the same interface that draws through SDL2 textures.
+
+    Every surface is uploaded once, the first time it is drawn, and its
+    texture lives as long as the surface does.  The images from the asset,
+    text and particle caches are shared, so they cost one upload each;
+    surfaces must not be modified after they are first drawn.  The static
+    layer is a texture too, and stamp() only re-uploads the stamped area.
+    Frames are always rebuilt in full, so there is no dirty mode.  Capturing
+    reads every frame back from the GPU (Renderer.to_surface()), which costs
+    far more than on the surface backend.
+    """
+    def __init__(self, renderer, backdrop):
+        from pygame._sdl2 import video
+        self.Texture  = video.Texture
+        self.renderer = renderer
+        self.backdrop = backdrop
+        self.static   = backdrop.copy()
+        self.static_texture = self.Texture.from_surface(renderer, self.static)
+        self.textures = weakref.WeakKeyDictionary()
+        self.dirty    = False
+        self.scene_key = None
+        self.rects    = []
+        self.capture  = None
+
+    def texture(self, surface):
+        tex = self.textures.get(surface)
+        if tex is None:
+            tex = self.textures[surface] = self.Texture.from_surface(self.renderer, surface)
+            profiler.count("uploads")
+        return tex
+
+    # ─── static layer ───
+    def scene(self, key):
+        if key==self.scene_key: return False
+        self.scene_key = key
+        self.static.blit(self.backdrop, (0, 0))
+        self.static_texture.update(self.static)
+        return True
+
+    def stamp(self, image, rect, area=None):
+        rect = pygame.Rect(rect.topleft, image.get_size() if area is None else area.size)
+        self.static.blit(self.backdrop, rect, rect)
+        self.static.blit(image, rect, area)
+        rect = rect.clip(self.static.get_rect())
+        if rect: self.static_texture.update(self.static.subsurface(rect), rect)
+
+    def set_backdrop(self, backdrop):
+        if backdrop is self.backdrop: return
+        self.backdrop = backdrop
+        self.scene_key = None
+
+    def invalidate(self):
+        pass
+
+    # ─── per frame ───
+    def begin(self):
+        self.static_texture.draw()
+
+    def blit(self, image, dest, area=None):
+        if area is None:
+            r = pygame.Rect((dest[0], dest[1]), image.get_size())
+        else:
+            area = pygame.Rect(area)
+            r = pygame.Rect((dest[0], dest[1]), area.size)
+        self.texture(image).draw(area, r)
+        self.rects.append(r)
+        return r
+
+    def blits(self, seq, doreturn=True):
+        rects = [self.blit(*item) for item in seq]
+        return rects if doreturn else None
+
+    def draw_rect(self, color, rect, width=0):
+        r = pygame.Rect(rect)
+        renderer = self.renderer
+        renderer.draw_color = pygame.Color(color)
+        if width==0: renderer.fill_rect(r)
+        for i in range(width):            # like pygame.draw.rect, the border grows inwards
+            renderer.draw_rect(r.inflate(-2*i, -2*i))
+        self.rects.append(r)
+        return r
+
+    def present(self):
+        profiler.count("blits", len(self.rects))
+        if self.capture: self.capture.grab(self.renderer.to_surface())
+        self.renderer.present()
+        self.rects = []
+
+
+def open_display(size, backend="surface", title="pygame window"):
+    """The display to draw on, for make_renderer().
+
+    "surface" is the set_mode() surface.  "texture" opens a window with an
+    SDL2 renderer (SDL picks the driver, usually a GPU one); "software"
+    forces SDL's software renderer, which needs no GPU.  Without
+    pygame._sdl2 or a working renderer this falls back to set_mode().
+    """
+    if backend!="surface":
+        window = None
+        try:
+            from pygame._sdl2 import video
+            window = video.Window(title, size)
+            return video.Renderer(window, accelerated=0 if backend=="software" else -1)
+        except (ImportError, RuntimeError) as exc:
+            if window: window.destroy()
+            print(f"{backend} renderer unavailable ({exc}); drawing with surfaces", file=sys.stderr)
+    pygame.display.set_caption(title)
+    return pygame.display.set_mode(size)
+
+
+def make_renderer(display, backdrop, dirty=False):
+    if isinstance(display, pygame.Surface):
+        return Renderer(display, backdrop, dirty=dirty)
+    return TextureRenderer(display, backdrop)
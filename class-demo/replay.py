@@ -0,0 +1,188 @@
+"""Replay files: one recorded game as a seed, an input byte per step and state snapshots.
+
+    python replay.py game.rpl                 # fast-forward headlessly, print the result
+    python replay.py game.rpl --seek 1800     # jump to a step via the nearest snapshot
+    python replay.py game.rpl --verify        # re-simulate and check every snapshot matches
+
+Inputs use one bit layout for both games: 1 left, 2 right, 4 space (fire /
+jump), 8 shift (boost).  The file is laid out so it can be memory-mapped:
+
+    header | meta (JSON) | inputs (uint8 per step) | snapshots | snapshot index
+
+Snapshots are whatever the game's snapshot() returns (numbers and NumPy
+arrays), stored as compressed .npz blobs; restore() puts them back.  One is
+taken every `interval` steps, so seeking costs at most interval steps of
+simulation after the restore.
+"""
+import argparse
+import io
+import json
+import mmap
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC   = b"RPLY"
+VERSION = 1
+HEADER  = struct.Struct("<4sHHIIQIIQ")   # magic, version, step ms, interval, frames, seed,
+                                        # meta bytes, snapshots, index offset
+INDEX   = np.dtype([("frame", "<u4"), ("offset", "<u8"), ("length", "<u8")])
+
+
+def rng_state(rng):
+    """random.Random state as a float64 array (version, 625 words, gauss or nan)"""
+    version, words, gauss = rng.getstate()
+    return np.array((version, *words, np.nan if gauss is None else gauss))
+
+def set_rng_state(rng, state):
+    gauss = float(state[-1])
+    rng.setstate((int(state[0]), tuple(int(w) for w in state[1:-1]), None if gauss!=gauss else gauss))
+
+
+def encode(snapshot):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **{k: np.asarray(v) for k, v in snapshot.items()})
+    return buf.getvalue()
+
+def decode(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as npz:
+        return {k: (a.item() if a.ndim==0 else a) for k, a in npz.items()}
+
+
+class Recorder:
+    """Records one game from its current state; call record(inputs) before each step.
+
+    meta is saved as JSON; "game" names which game it is (see open_game()).
+    """
+    def __init__(self, game, seed, step_ms, meta, interval=600):
+        self.game, self.seed, self.step_ms, self.interval = game, seed, step_ms, interval
+        self.meta = meta
+        self.inputs = bytearray()
+        self.snapshots = [(0, encode(game.snapshot()))]
+
+    def record(self, inputs):
+        n = len(self.inputs)
+        if n and n % self.interval==0:
+            self.snapshots.append((n, encode(self.game.snapshot())))
+        self.inputs.append(inputs)
+
+    def save(self, path):
+        meta = json.dumps(self.meta).encode()
+        body = HEADER.size + len(meta) + len(self.inputs)
+        body += -body % 8                                   # snapshots start 8-byte aligned
+        index = np.zeros(len(self.snapshots), INDEX)
+        offset = body
+        for i, (frame, blob) in enumerate(self.snapshots):
+            index[i] = frame, offset, len(blob)
+            offset += len(blob)
+        with open(path, "wb") as fh:
+            fh.write(HEADER.pack(MAGIC, VERSION, self.step_ms, self.interval, len(self.inputs),
+                                 self.seed, len(meta), len(index), offset))
+            fh.write(meta)
+            fh.write(self.inputs)
+            fh.write(bytes(body - fh.tell()))
+            for _, blob in self.snapshots: fh.write(blob)
+            fh.write(index.tobytes())
+
+
+class Replay:
+    """A recorded game read through a memory map.
+
+    inputs and index are NumPy views straight onto the file, so opening
+    even a long replay reads nothing but the header.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self.map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.step_ms, self.interval, frames, self.seed,
+         meta_len, count, index_at) = HEADER.unpack_from(self.map)
+        if magic!=MAGIC or version!=VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} replay file")
+        self.meta   = json.loads(self.map[HEADER.size:HEADER.size + meta_len])
+        self.inputs = np.frombuffer(self.map, np.uint8, frames, HEADER.size + meta_len)
+        self.index  = np.frombuffer(self.map, INDEX, count, index_at)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def close(self):
+        del self.inputs, self.index                 # views must go before the map closes
+        self.map.close()
+
+    def snapshot(self, i):
+        """(frame, state) of snapshot i"""
+        frame, offset, length = self.index[i].tolist()
+        return frame, decode(self.map[offset:offset + length])
+
+    def play(self, game, start=0, stop=None):
+        """Step game through the recorded inputs of steps start..stop"""
+        step, inputs, step_ms = game.step, self.inputs, self.step_ms
+        for bits in inputs[start:stop].tolist():
+            step(bits, step_ms)
+
+    def seek(self, game, frame=0):
+        """Put game in its state just before step `frame`: the nearest earlier
+        snapshot, then fast-forward the rest of the way"""
+        frame = min(max(frame, 0), len(self))
+        i = int(np.searchsorted(self.index["frame"], frame, "right")) - 1
+        start, state = self.snapshot(i)
+        game.restore(state)
+        self.play(game, start, frame)
+
+    def verify(self, game):
+        """Re-simulate from the start; returns the first snapshot frame that
+        doesn't match, or None if the run reproduces exactly"""
+        self.seek(game, 0)
+        for i in range(1, len(self.index)):
+            frame, state = self.snapshot(i)
+            self.play(game, int(self.index["frame"][i - 1]), frame)
+            if not same(game.snapshot(), state): return frame
+            game.restore(state)
+        return None
+
+
+def same(a, b):
+    return a.keys()==b.keys() and all(np.array_equal(np.asarray(a[k]), np.asarray(b[k]), equal_nan=True)
+                                      for k in a)
+
+
+def open_game(replay):
+    """A headless game of the kind the replay was recorded from"""
+    import main
+    main.init_pygame(headless=True)
+    if replay.meta["game"]=="runner":
+        import dash
+        return dash.Game(governor=False, difficulty=replay.meta.get("difficulty", "classic"))
+    return main.Invaders(**replay.meta.get("options", {}))
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--seek", type=int, metavar="STEP", help="stop at this step instead of the end")
+    parser.add_argument("--verify", action="store_true",
+                        help="check the simulation reproduces every snapshot")
+    args = parser.parse_args(argv)
+
+    replay = Replay(args.path)
+    game = open_game(replay)
+    print(f"{replay.meta['game']}: seed {replay.seed}, {len(replay)} steps, "
+          f"{len(replay.index)} snapshots every {replay.interval}")
+    if args.verify:
+        bad = replay.verify(game)
+        print("reproduces exactly" if bad is None else f"diverged before step {bad}")
+        if bad is not None: sys.exit(1)
+        return
+    target = len(replay) if args.seek is None else min(args.seek, len(replay))
+    t = time.perf_counter()
+    replay.seek(game, target)
+    secs = time.perf_counter() - t
+    state = game.snapshot()
+    print(f"step {target}: score {state['score']}  "
+          f"({secs*1000:.0f} ms, {target*replay.step_ms/1000/max(secs, 1e-9):.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,278 @@
+"""Vectorized endless-runner environment: N games of dash.py stepped as NumPy arrays.
+
+    python runner_env.py --episodes 100000
+    python runner_env.py --episodes 100000 --spawn-time 1000 --boost-cooldown 2000
+
+The rules are dash.Game's, step for step (same constants, same 16 ms step,
+same Rect rounding and pixel-mask collision test), minus everything that
+draws or plays sound.  Randomness comes from a NumPy generator, so episodes match
+dash.py in distribution rather than seed for seed.
+
+Tunable settings (spawn_time, enemy_spawn_time, boost_cooldown,
+boost_duration, hole_chance) each take a scalar, one value per game, or a
+difficulty curve: a function of each game's elapsed ms returning either.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from assets import assets
+from collision import mask
+from dash import (BOOST_COOLDOWN, BOOST_DURATION, BOOST_SPEED, FLYING_ENEMY_AMPLITUDE,
+                  FLYING_ENEMY_FREQUENCY, FLYING_ENEMY_SIZE, FLYING_ENEMY_SPAWN_TIME,
+                  FLYING_ENEMY_SPEED, FRAME_MS, GRAVITY, GROUND_HEIGHT, HOLE_CHANCE,
+                  INPUT_BOOST, INPUT_JUMP, JUMP_VELOCITY, OBSTACLE_HEIGHT, OBSTACLE_SPAWN_TIME,
+                  OBSTACLE_SPEED, OBSTACLE_WIDTH, PLAYER_SIZE, PLAYER_X, SCREEN_HEIGHT, SCREEN_WIDTH)
+from levels import setting
+
+GROUND_Y  = SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_SIZE      # player y when standing
+BLOCK_Y   = SCREEN_HEIGHT - GROUND_HEIGHT - OBSTACLE_HEIGHT
+ENEMY_LO, ENEMY_HI = SCREEN_HEIGHT//4, SCREEN_HEIGHT//2      # flying enemy start heights
+OBS_SIZE  = 7
+
+
+def rect_round(v):
+    """Round like pygame.Rect does when given floats (halves away from zero)"""
+    return np.trunc(v + np.copysign(0.5, v)).astype(np.int64)
+
+
+class RunnerEnv:
+    """N independent runner games with batched actions, gym-style.
+
+    step(actions) takes one INPUT_JUMP | INPUT_BOOST bitmask per game and
+    returns (obs, reward, done, info).  reward is the score gained this
+    step; done marks games that crashed, or were cut off by max_ms.
+    Finished games restart at once, so obs already shows their new
+    episode; info["score"] holds the final score of every game that just
+    finished, and info["truncated"] flags the ones that hit max_ms.
+    """
+    def __init__(self, n, seed=None, max_ms=None, slots=8,
+                 spawn_time=OBSTACLE_SPAWN_TIME, enemy_spawn_time=FLYING_ENEMY_SPAWN_TIME,
+                 boost_cooldown=BOOST_COOLDOWN, boost_duration=BOOST_DURATION, hole_chance=HOLE_CHANCE):
+        self.n, self.max_ms = n, max_ms
+        self.rng = np.random.default_rng(seed)
+        self.spawn_time, self.enemy_spawn_time = spawn_time, enemy_spawn_time
+        self.boost_cooldown, self.boost_duration = boost_cooldown, boost_duration
+        self.hole_chance = hole_chance
+        self.rows = np.arange(n)
+        # player
+        self.time       = np.zeros(n, np.int64)          # game time since the episode started
+        self.x          = np.zeros(n, np.int64)
+        self.y          = np.zeros(n)
+        self.vy         = np.zeros(n)
+        self.jumping    = np.zeros(n, bool)
+        self.boosting   = np.zeros(n, bool)
+        self.boost_start = np.zeros(n, np.int64)
+        self.last_boost = np.zeros(n, np.int64)
+        self.score      = np.zeros(n, np.int64)
+        self.last_block = np.zeros(n, np.int64)
+        self.last_enemy = np.zeros(n, np.int64)
+        # obstacles and flying enemies, in fixed slots per game (holes never collide, so aren't kept)
+        self.block_on = np.zeros((n, slots), bool)
+        self.block_x  = np.zeros((n, slots), np.int64)
+        self.enemy_on = np.zeros((n, slots), bool)
+        self.enemy_x  = np.zeros((n, slots), np.int64)
+        self.enemy_y0 = np.zeros((n, slots))
+        self.enemy_t  = np.zeros((n, slots))
+        self.overflow = 0                                # spawns dropped for want of a slot
+        # the sprites' pixel masks, for confirming rect hits as dash.Game does
+        self.player_mask = mask(assets.image('player1.png', (PLAYER_SIZE, PLAYER_SIZE)))
+        self.block_mask = mask(assets.image('bad.png', (OBSTACLE_WIDTH, OBSTACLE_HEIGHT)))
+        self.enemy_mask = mask(assets.image('bad.png', (FLYING_ENEMY_SIZE, FLYING_ENEMY_SIZE)))
+        self.episodes = 0
+
+    def reset(self, mask=None):
+        """Restart the games in mask (all by default); returns obs"""
+        m = slice(None) if mask is None else mask
+        self.time[m] = 0
+        self.x[m], self.y[m], self.vy[m] = PLAYER_X, GROUND_Y, 0.0
+        self.jumping[m] = self.boosting[m] = False
+        self.boost_start[m] = 0
+        self.last_boost[m] = -10**9                  # boost is ready from the start
+        self.score[m] = self.last_block[m] = self.last_enemy[m] = 0
+        self.block_on[m] = self.enemy_on[m] = False
+        return self.observe()
+
+    def spawn(self, due, on):
+        """Put a new entry in the first free slot of every game in due; returns (rows, slots)"""
+        slot = np.argmin(on, axis=1)
+        free = due & ~on[self.rows, slot]
+        self.overflow += int(np.count_nonzero(due & ~free))
+        rows = np.flatnonzero(free)
+        on[rows, slot[rows]] = True
+        return rows, slot[rows]
+
+    def touching(self, hit, xs, ys, other):
+        """hit, keeping only the rect hits where the player's and other's masks overlap"""
+        ys = np.broadcast_to(ys, hit.shape)
+        for row, slot in zip(*np.nonzero(hit)):
+            offset = (int(xs[row, slot] - self.x[row]), int(ys[row, slot] - self.rect_y[row]))
+            if self.player_mask.overlap(other, offset) is None: hit[row, slot] = False
+        return hit
+
+    def enemy_y(self):
+        y = self.enemy_y0 + FLYING_ENEMY_AMPLITUDE*np.sin(self.enemy_t)
+        return np.clip(y, ENEMY_LO, ENEMY_HI + FLYING_ENEMY_AMPLITUDE)
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        t = self.time = self.time + FRAME_MS
+        # keys: the same checks as Player.jump() and Player.boost()
+        jump = (actions & INPUT_JUMP > 0) & ~self.jumping
+        self.vy[jump] = JUMP_VELOCITY
+        self.jumping |= jump
+        cooldown = setting(self.boost_cooldown, t)
+        boost = (actions & INPUT_BOOST > 0) & ~self.boosting & (t - self.last_boost >= cooldown)
+        self.boosting |= boost
+        self.boost_start[boost] = self.last_boost[boost] = t[boost]
+
+        # Player.update
+        active = self.boosting & (t - self.boost_start < setting(self.boost_duration, t))
+        self.x = np.where(active, np.minimum(self.x + BOOST_SPEED, PLAYER_X + 200),
+                          np.maximum(PLAYER_X, self.x - 5))
+        self.boosting = active
+        self.vy += GRAVITY
+        self.y += self.vy
+        landed = self.y >= GROUND_Y
+        self.y[landed] = GROUND_Y
+        self.vy[landed] = 0.0
+        self.jumping &= ~landed
+
+        # spawns, then everything scrolls (new arrivals included, as in Game.update)
+        due = t - self.last_block > setting(self.spawn_time, t)
+        self.last_block[due] = t[due]
+        rows, slot = self.spawn(due & (self.rng.random(self.n) >= setting(self.hole_chance, t)), self.block_on)
+        self.block_x[rows, slot] = SCREEN_WIDTH
+        due = t - self.last_enemy > setting(self.enemy_spawn_time, t)
+        self.last_enemy[due] = t[due]
+        rows, slot = self.spawn(due, self.enemy_on)
+        self.enemy_x[rows, slot] = SCREEN_WIDTH
+        self.enemy_y0[rows, slot] = self.rng.integers(ENEMY_LO, ENEMY_HI + 1, len(rows))
+        self.enemy_t[rows, slot] = 0.0
+        self.block_x -= OBSTACLE_SPEED
+        self.enemy_x -= FLYING_ENEMY_SPEED
+        self.enemy_t += FLYING_ENEMY_FREQUENCY
+        self.block_on &= self.block_x + OBSTACLE_WIDTH >= 0
+        self.enemy_on &= self.enemy_x + FLYING_ENEMY_SIZE >= 0
+
+        # collisions: Rect.colliderect, then the masks for the few rect hits; skipped while boosting
+        self.rect_y = rect_round(self.y)
+        px, py, live = self.x[:, None], self.rect_y[:, None], ~self.boosting[:, None]
+        hit = live & self.block_on & (px < self.block_x + OBSTACLE_WIDTH) & (self.block_x < px + PLAYER_SIZE) \
+            & (py < BLOCK_Y + OBSTACLE_HEIGHT) & (BLOCK_Y < py + PLAYER_SIZE)
+        crashed = self.touching(hit, self.block_x, BLOCK_Y, self.block_mask).any(axis=1)
+        ey = rect_round(self.enemy_y())
+        hit = live & self.enemy_on & (px < self.enemy_x + FLYING_ENEMY_SIZE) & (self.enemy_x < px + PLAYER_SIZE) \
+            & (py < ey + FLYING_ENEMY_SIZE) & (ey < py + PLAYER_SIZE)
+        crashed |= self.touching(hit, self.enemy_x, ey, self.enemy_mask).any(axis=1)
+
+        score = np.where(crashed, self.score, t//10)
+        reward = score - self.score
+        self.score = score
+        truncated = (t >= self.max_ms) & ~crashed if self.max_ms else np.zeros(self.n, bool)
+        done = crashed | truncated
+        info = {"score": np.where(done, score, 0), "truncated": truncated}
+        if done.any():
+            self.episodes += int(np.count_nonzero(done))
+            self.reset(done)
+        return self.observe(), reward, done, info
+
+    def observe(self):
+        """Per game: height, vertical speed, boosting, boost cooldown left, then the
+        distance to the nearest block and flying enemy ahead and that enemy's
+        height relative to the player (distances 1 when there is none)"""
+        obs = np.empty((self.n, OBS_SIZE), np.float32)
+        obs[:, 0] = (GROUND_Y - self.y)/SCREEN_HEIGHT
+        obs[:, 1] = self.vy/-JUMP_VELOCITY
+        obs[:, 2] = self.boosting
+        cooldown = np.broadcast_to(setting(self.boost_cooldown, self.time), self.n)
+        obs[:, 3] = np.clip(1 - (self.time - self.last_boost)/cooldown, 0, 1)
+        px = self.x[:, None]
+        ahead = self.block_on & (self.block_x + OBSTACLE_WIDTH > px)
+        obs[:, 4] = np.where(ahead, self.block_x - px, SCREEN_WIDTH).min(axis=1)/SCREEN_WIDTH
+        ahead = self.enemy_on & (self.enemy_x + FLYING_ENEMY_SIZE > px)
+        dist = np.where(ahead, self.enemy_x - px, SCREEN_WIDTH)
+        nearest = dist.argmin(axis=1)
+        obs[:, 5] = dist[self.rows, nearest]/SCREEN_WIDTH
+        obs[:, 6] = np.where(ahead[self.rows, nearest],
+                             (self.enemy_y()[self.rows, nearest] - self.y)/SCREEN_HEIGHT, 0.0)
+        return obs
+
+
+# ───────── policies: obs, rng -> actions ─────────
+def heuristic(obs, rng):
+    """bench.py's runner bot: jump blocks, boost through flying enemies"""
+    block, enemy = obs[:, 4]*SCREEN_WIDTH, obs[:, 5]*SCREEN_WIDTH
+    return np.where((block > 0) & (block < 120), INPUT_JUMP, 0) | \
+           np.where((enemy > 0) & (enemy < 150), INPUT_BOOST, 0)
+
+def random_policy(obs, rng):
+    return rng.choice((0, 0, 0, 0, INPUT_JUMP, INPUT_BOOST), len(obs))
+
+POLICIES = {"heuristic": heuristic, "random": random_policy}
+
+
+def rollout(episodes, envs=1024, policy="heuristic", seed=None, **settings):
+    """Play until `episodes` games have finished; returns their scores"""
+    env = RunnerEnv(envs, seed=seed, **settings)
+    act = POLICIES[policy]
+    rng = np.random.default_rng(seed)
+    obs, scores = env.reset(), []
+    while env.episodes < episodes:
+        obs, _, done, info = env.step(act(obs, rng))
+        if done.any(): scores.append(info["score"][done])
+    return np.concatenate(scores)[:episodes] if scores else np.zeros(0, np.int64)
+
+def _rollout(job):
+    episodes, kwargs = job
+    return rollout(episodes, **kwargs)
+
+def parallel_rollout(episodes, workers=None, seed=0, **kwargs):
+    """rollout() split across processes, one share per worker"""
+    workers = workers or os.cpu_count() or 1
+    if workers==1: return rollout(episodes, seed=seed, **kwargs)
+    shares = [episodes//workers + (i < episodes % workers) for i in range(workers)]
+    jobs = [(share, dict(kwargs, seed=seed + i)) for i, share in enumerate(shares)]
+    # dash's pygame.init() has SDL catch SIGTERM, so the pool's terminate() on
+    # exit can't stop workers: close and join instead.  spawn, not fork, so no
+    # worker inherits a copy of the parent's SDL threads.
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        scores = pool.map(_rollout, jobs)
+        pool.close()
+        pool.join()
+    return np.concatenate(scores)
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=100_000)
+    parser.add_argument("--envs", type=int, default=4096, help="games stepped together per worker")
+    parser.add_argument("--workers", type=int, help="processes (default: one per core)")
+    parser.add_argument("--policy", choices=POLICIES, default="heuristic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-seconds", type=float, default=30,
+                        help="cut episodes off after this much game time")
+    parser.add_argument("--spawn-time", type=int, default=OBSTACLE_SPAWN_TIME)
+    parser.add_argument("--enemy-spawn-time", type=int, default=FLYING_ENEMY_SPAWN_TIME)
+    parser.add_argument("--boost-cooldown", type=int, default=BOOST_COOLDOWN)
+    args = parser.parse_args(argv)
+
+    t = time.perf_counter()
+    scores = parallel_rollout(args.episodes, args.workers, seed=args.seed, envs=args.envs,
+                              policy=args.policy, max_ms=int(args.max_seconds*1000),
+                              spawn_time=args.spawn_time, enemy_spawn_time=args.enemy_spawn_time,
+                              boost_cooldown=args.boost_cooldown)
+    secs = time.perf_counter() - t
+    print(f"{len(scores)} episodes in {secs:.1f} s ({len(scores)/secs*60:,.0f}/min)")
+    print(f"score mean {scores.mean():.0f}  p10 {np.percentile(scores, 10):.0f}  "
+          f"p50 {np.percentile(scores, 50):.0f}  p90 {np.percentile(scores, 90):.0f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,73 @@
+import numpy as np
+import pygame
+
+SHIELD_COLOR = (50, 200, 50)
+
+
+def bunker_grid(cell=2):
+    """Occupancy grid for the classic 120x80 bunker with an arch cut in the top"""
+    grid = np.ones((80//cell, 120//cell), dtype=bool)
+    grid[:30//cell, 40//cell:80//cell] = False       # carve top arch
+    return grid
+
+
+class Bunker:
+    """One shield bunker: a bool occupancy grid and a single cached surface.
+
+    grid[row, col] covers a cell x cell pixel square.  Hits clear cells out of
+    the grid and only the damaged box of the surface gets rewritten, so a
+    bunker is one blit and one rect test per bullet no matter how chewed up
+    it is.
+    """
+    def __init__(self, x, y, grid, cell=2, color=SHIELD_COLOR):
+        self.grid = grid
+        self.cell = cell
+        rows, cols = grid.shape
+        self.rect  = pygame.Rect(x, y, cols*cell, rows*cell)
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.image.fill(color)
+        self.redraw(0, 0, cols, rows)
+
+    def redraw(self, c0, r0, c1, r1):
+        """Copy grid cells [r0:r1, c0:c1] into the surface's alpha channel"""
+        cell = self.cell
+        block = self.grid[r0:r1, c0:c1].T.repeat(cell, 0).repeat(cell, 1)
+        alpha = pygame.surfarray.pixels_alpha(self.image)    # indexed [x, y]
+        alpha[c0*cell:c1*cell, r0*cell:r1*cell] = block*255
+        del alpha                                            # unlock the surface
+        self.dirty = True                                    # cached copies are stale
+
+    def hit(self, rect, falling):
+        """Impact point of a bullet rect, or None if it only overlaps holes.
+
+        Bullets hit the first solid row they meet: the top one when falling,
+        the bottom one when rising.
+        """
+        if not self.rect.colliderect(rect): return None
+        cell, rows, cols = self.cell, *self.grid.shape
+        x, y = rect.left - self.rect.x, rect.top - self.rect.y
+        c0, c1 = max(0, x//cell), min(cols, -(-(x + rect.width)//cell))
+        r0, r1 = max(0, y//cell), min(rows, -(-(y + rect.height)//cell))
+        region = self.grid[r0:r1, c0:c1]
+        solid = np.flatnonzero(region.any(axis=1))
+        if not len(solid): return None
+        r = solid[0] if falling else solid[-1]
+        c = np.flatnonzero(region[r]).mean()
+        return (self.rect.x + int((c0 + c + 0.5)*cell),
+                self.rect.y + int((r0 + r + 0.5)*cell))
+
+    def carve(self, x, y, radius):
+        """Clear every cell whose centre is within radius pixels of (x, y)"""
+        cell, rows, cols = self.cell, *self.grid.shape
+        cx, cy = (x - self.rect.x)/cell, (y - self.rect.y)/cell
+        rad = max(radius/cell, 0.5)
+        c0, c1 = max(0, int(cx - rad)), min(cols, int(cx + rad) + 1)
+        r0, r1 = max(0, int(cy - rad)), min(rows, int(cy + rad) + 1)
+        if c0>=c1 or r0>=r1: return
+        ys, xs = np.ogrid[r0:r1, c0:c1]
+        blast = (xs + 0.5 - cx)**2 + (ys + 0.5 - cy)**2 <= rad*rad
+        self.grid[r0:r1, c0:c1] &= ~blast
+        self.redraw(c0, r0, c1, r1)
+
+    def draw(self, screen):
+        screen.blit(self.image, self.rect)
@@ -0,0 +1,100 @@
+import os
+import time
+
+import pygame
+
+from profiler import profiler
+
+COUNTERS = "played", "throttled", "voice_limited", "stolen"
+
+_reserved = 0
+
+
+def reserve(count):
+    """Keep the first count mixer channels out of Sound.play()'s automatic picks.
+
+    Never lowers what is already reserved, so the music channel and the
+    sound bank can reserve theirs in either order.
+    """
+    global _reserved
+    _reserved = max(_reserved, count)
+    if pygame.mixer.get_num_channels()<_reserved: pygame.mixer.set_num_channels(_reserved)
+    pygame.mixer.set_reserved(_reserved)
+
+
+class Effect:
+    def __init__(self, sound, category, max_voices, min_interval):
+        self.sound, self.category = sound, category
+        self.max_voices, self.min_interval = max_voices, min_interval
+        self.last = float("-inf")                     # ms when it last started
+
+
+class SoundBank:
+    """Sound effects decoded once, played through per-category channel pools.
+
+    effects maps a name to (file, category, max voices, min ms between
+    starts) and categories maps each category to how many channels it
+    owns.  Every file is decoded when the bank is built, so play() never
+    touches the disk; missing files are skipped.  play() drops a retrigger
+    inside the effect's min interval or past its max voices, and takes a
+    free channel from the category's pool, stealing the one that started
+    longest ago when all are busy.  With reduced set (the quality governor's
+    audio tier) each category keeps to its first channel.  stats() has
+    played/throttled/voice_limited/stolen counts per effect.
+    """
+    def __init__(self, effects, categories, directory="sounds", first_channel=1):
+        self.enabled = bool(pygame.mixer.get_init())
+        self.effects = {}
+        self.pools = {}                               # category -> [[channel, effect name, start ms]]
+        self.reduced = False
+        self.counters = {name: dict.fromkeys(COUNTERS, 0) for name in effects}
+        if not self.enabled: return
+        end = first_channel + sum(categories.values())
+        reserve(end)                                  # channel 0 and below stay the music's
+        first = first_channel
+        for category, count in categories.items():
+            self.pools[category] = [[pygame.mixer.Channel(i), None, float("-inf")]
+                                    for i in range(first, first + count)]
+            first += count
+        for name, (file, category, max_voices, min_interval) in effects.items():
+            path = os.path.join(directory, file)
+            if os.path.exists(path):
+                self.effects[name] = Effect(pygame.mixer.Sound(path), category, max_voices, min_interval)
+
+    def play(self, name, now=None):
+        """Start effect name; returns its Channel, or None if it was skipped"""
+        effect = self.effects.get(name)
+        if effect is None: return None
+        counters = self.counters[name]
+        now = time.perf_counter()*1000 if now is None else now
+        if now - effect.last < effect.min_interval:
+            counters["throttled"] += 1
+            return None
+        pool = self.pools[effect.category]
+        if self.reduced: pool = pool[:1]
+        voices, free, oldest = 0, None, pool[0]
+        for slot in pool:
+            if slot[0].get_busy():
+                if slot[1]==name: voices += 1
+            elif free is None:
+                free = slot
+            if slot[2]<oldest[2]: oldest = slot
+        if voices>=effect.max_voices:
+            counters["voice_limited"] += 1
+            return None
+        if free is None:
+            free = oldest
+            counters["stolen"] += 1
+        free[0].play(effect.sound)
+        free[1], free[2] = name, now
+        effect.last = now
+        counters["played"] += 1
+        profiler.count("sounds")
+        return free[0]
+
+    def stop(self):
+        for pool in self.pools.values():
+            for slot in pool: slot[0].stop()
+
+    def stats(self):
+        return {name: dict(counters) for name, counters in self.counters.items()}
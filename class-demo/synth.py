@@ -0,0 +1,90 @@
+import numpy as np
+
+SAMPLE_RATE = 44100
+MIXER = SAMPLE_RATE, -16, 2     # pygame.mixer format both games use: rate, signed 16 bit, stereo
+
+
+# ───────── oscillators ─────────
+# freq can be a number or an array with one frequency per sample; the phase
+# is accumulated sample by sample, so sweeps never click or jump.
+def phase(freq, n, sample_rate=SAMPLE_RATE):
+    if np.ndim(freq)==0:
+        return 2*np.pi*freq*np.arange(n)/sample_rate
+    freq = np.asarray(freq, dtype=np.float64)[:n]
+    return 2*np.pi*(np.cumsum(freq) - freq[0])/sample_rate
+
+def sine(freq, n, sample_rate=SAMPLE_RATE):
+    return np.sin(phase(freq, n, sample_rate))
+
+def square(freq, n, sample_rate=SAMPLE_RATE, duty=0.5):
+    cycle = phase(freq, n, sample_rate)/(2*np.pi) % 1.0
+    return np.where(cycle<duty, 1.0, -1.0)
+
+def noise(n, rng):
+    return rng.uniform(-1.0, 1.0, n)
+
+def sweep(start, end, n, curve="linear"):
+    """Per-sample frequencies from start to end Hz, for chirps"""
+    if curve=="exp":
+        return np.geomspace(start, end, n)
+    return np.linspace(start, end, n)
+
+def chirp(start, end, n, sample_rate=SAMPLE_RATE, wave="sine", curve="linear"):
+    return OSCILLATORS[wave](sweep(start, end, n, curve), n, sample_rate)
+
+OSCILLATORS = {"sine": sine, "square": square}
+
+
+# ───────── envelopes and mixing ─────────
+def adsr(n, attack=0.0, decay=0.0, sustain=1.0, release=0.0, sample_rate=SAMPLE_RATE):
+    """Attack/decay/release in seconds, sustain as a level; fits inside n samples"""
+    a, d, r = (int(x*sample_rate) for x in (attack, decay, release))
+    s = max(0, n - a - d - r)
+    knots  = np.cumsum([0, a, d, s, r])
+    levels = [0.0 if a else 1.0, 1.0, sustain, sustain, 0.0 if r else sustain]
+    return np.interp(np.arange(n), knots, levels)
+
+def mix(*layers, start=None, sample_rate=SAMPLE_RATE):
+    """Sum layers, each placed at its start time (seconds) if given"""
+    offsets = [int(t*sample_rate) for t in start] if start else [0]*len(layers)
+    out = np.zeros(max((o + len(l) for o, l in zip(offsets, layers)), default=0))
+    for o, layer in zip(offsets, layers):
+        out[o:o + len(layer)] += layer
+    return out
+
+def to_int16(wave, volume=1.0):
+    return (np.clip(wave*volume, -1.0, 1.0)*32767).astype(np.int16)
+
+
+# ───────── declarative sounds ─────────
+def render_layer(layer, duration, sample_rate, rng):
+    n = int(layer.get("duration", duration)*sample_rate)
+    wave = layer.get("wave", "sine")
+    freq = layer.get("freq", 440)
+    if wave=="noise":
+        out = noise(n, rng)
+    elif isinstance(freq, (list, tuple)):
+        out = chirp(freq[0], freq[1], n, sample_rate, wave, layer.get("curve", "linear"))
+    else:
+        out = OSCILLATORS[wave](freq, n, sample_rate)
+    if "envelope" in layer:
+        out = out*adsr(n, *layer["envelope"], sample_rate=sample_rate)
+    return out*layer.get("gain", 1.0)
+
+def render(spec, sample_rate=SAMPLE_RATE, seed=0):
+    """Render a sound spec to float samples in [-1, 1].
+
+    spec = {"duration": s, "volume": v, "layers": [layer, ...]} where a layer is
+    {"wave": "sine"|"square"|"noise", "freq": hz or [from_hz, to_hz],
+     "curve": "linear"|"exp", "gain": g, "start": s, "duration": s,
+     "envelope": (attack, decay, sustain, release)}.  Noise is seeded, so the
+    same spec always renders the same samples.
+    """
+    rng = np.random.default_rng(seed)
+    duration = spec["duration"]
+    layers = [render_layer(layer, duration, sample_rate, rng) for layer in spec["layers"]]
+    out = mix(*layers, start=[layer.get("start", 0) for layer in spec["layers"]],
+              sample_rate=sample_rate)
+    n = int(duration*sample_rate)
+    out = np.pad(out, (0, max(0, n - len(out))))[:n]
+    return np.clip(out*spec.get("volume", 1.0), -1.0, 1.0)
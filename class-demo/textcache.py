@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+import pygame
+
+from profiler import profiler
+
+
+class DigitAtlas:
+    """Pre-rendered glyphs for one (font, color), for drawing changing numbers.
+
+    Numbers are laid out glyph by glyph with each glyph's own advance, so a
+    new score is a handful of blits instead of a FreeType render.
+    """
+    def __init__(self, font, color, chars="0123456789"):
+        self.glyphs = {ch: font.render(ch, True, color) for ch in chars}
+        self.height = font.get_height()
+
+    def width(self, text):
+        return sum(self.glyphs[ch].get_width() for ch in text)
+
+    def blit(self, target, text, pos):
+        """Draw text (digits only) at pos; target is a Surface or Renderer"""
+        x, y = pos
+        seq = []
+        for ch in text:
+            glyph = self.glyphs[ch]
+            seq.append((glyph, (x, y)))
+            x += glyph.get_width()
+        target.blits(seq)
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, string, color, antialias).
+
+    Labels and menu strings are rendered once and kept in a bounded LRU.
+    Use number() for values that keep changing, like scores: the label
+    comes from the cache and the digits from a DigitAtlas, so nothing on the
+    hot path calls Font.render.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.atlases = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = font, text, color, antialias
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surf
+        self.misses += 1
+        profiler.count("surfaces")
+        surf = self.entries[key] = font.render(text, antialias, color)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def atlas(self, font, color):
+        key = font, color
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = self.atlases[key] = DigitAtlas(font, color)
+        return atlas
+
+    def number(self, target, font, color, label, digits, pos=None, center=None):
+        """Draw label + digits (a string of 0-9) at topleft pos or centered.
+
+        Returns the rect covered.
+        """
+        label_surf = self.render(font, label, color)
+        atlas = self.atlas(font, color)
+        w = label_surf.get_width() + atlas.width(digits)
+        h = max(label_surf.get_height(), atlas.height)
+        rect = pygame.Rect(0, 0, w, h)
+        if center: rect.center = center
+        else: rect.topleft = pos
+        target.blit(label_surf, rect.topleft)
+        atlas.blit(target, digits, (rect.x + label_surf.get_width(), rect.y))
+        return rect
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+
+# Shared by both games' HUDs and menus
+text = TextCache()